@@ -0,0 +1,117 @@
+from Model.activity_model import ActivityModel
+
+class ActivityController:
+    def __init__(self):
+        self.model = ActivityModel()
+
+    def fetch_activities_with_status(self, class_id, student_id, fresh=False):
+        # fresh=True skips the cache, for polls that compare the result with what is shown
+        try:
+            activities = self.model.get_activities(class_id, fresh=fresh)
+            completed_activities = set(self.model.get_completed_activity_ids(
+                student_id, class_id, activity_ids=[activity['activity_id'] for activity in activities], fresh=fresh
+            ))
+            # Toggles still waiting in the outbox override what the server knows
+            for activity_id, done in self.model.get_pending_statuses(student_id).items():
+                if done:
+                    completed_activities.add(activity_id)
+                else:
+                    completed_activities.discard(activity_id)
+
+            activities_with_status = []
+            for activity in activities:
+                activities_with_status.append(self._with_status(activity, completed_activities))
+
+            return sorted(activities_with_status, key=lambda x: x['created_at'])
+        except Exception as e:
+            print(f"Error fetching activities: {e}")
+            return []
+
+    def fetch_class_progress(self, class_id, student_id):
+        return self.fetch_progress_for_classes([class_id], student_id).get(class_id, self._progress(0, 0))
+
+    def fetch_progress_for_classes(self, class_ids, student_id, on_refresh=None):
+        # {class_id: {"completed", "total", "percent"}}; an empty dict if the counts could not be loaded
+        try:
+            counts = self.model.get_class_progress(
+                student_id,
+                class_ids,
+                on_refresh=on_refresh and (lambda refreshed: on_refresh(self._with_percent(refreshed))),
+            )
+            return self._with_percent(counts)
+        except Exception as e:
+            print(f"Error fetching class progress: {e}")
+            return {}
+
+    @classmethod
+    def _with_percent(cls, counts):
+        return {class_id: cls._progress(count["completed"], count["total"]) for class_id, count in counts.items()}
+
+    @staticmethod
+    def _progress(completed, total):
+        return {
+            "completed": completed,
+            "total": total,
+            "percent": round((completed / total) * 100) if total > 0 else 0,
+        }
+
+    def set_activity_status(self, activity_id, student_id, done):
+        if done:
+            return self.model.mark_complete(activity_id, student_id)
+        return self.model.mark_incomplete(activity_id, student_id)
+
+    def queue_activity_status(self, activity_id, student_id, done):
+        # Returns right away; the write is replayed in the background, even after a restart
+        self.model.queue_status(activity_id, student_id, done)
+
+    def watch_writes(self, listener):
+        self.model.outbox.add_listener(listener)
+
+    def unwatch_writes(self, listener):
+        self.model.outbox.remove_listener(listener)
+
+    def watch_activities(self, class_id, student_id, on_change, on_status=None):
+        # on_change(change) and on_status(table, status) are called from the realtime thread
+        return [
+            self.model.subscribe_activities(
+                class_id, on_change, on_status=on_status and (lambda status: on_status("activity_table", status))
+            ),
+            self.model.subscribe_completions(
+                student_id, on_change, on_status=on_status and (lambda status: on_status("activity_student", status))
+            ),
+        ]
+
+    def unwatch_activities(self, subscriptions):
+        for subscription in subscriptions:
+            self.model.unsubscribe(subscription)
+
+    def apply_change(self, activities, change):
+        # Returns the updated list, or None when the change cannot be applied locally
+        record = change["record"]
+        old_record = change["old_record"]
+        if change["table"] == "activity_table":
+            activity_id = (old_record if change["type"] == "DELETE" else record).get("activity_id")
+            if activity_id is None:
+                return None
+            remaining = [activity for activity in activities if activity['activity_id'] != activity_id]
+            if change["type"] == "DELETE":
+                return remaining
+            completed = {activity['activity_id'] for activity in activities if activity['done']}
+            remaining.append(self._with_status(record, completed))
+            return sorted(remaining, key=lambda x: x['created_at'])
+
+        done = change["type"] != "DELETE"
+        # Deletes only carry the primary key unless activity_student has REPLICA IDENTITY FULL
+        activity_id = (record if done else old_record).get("activity_id")
+        if activity_id is None:
+            return None
+        return [dict(activity, done=done) if activity['activity_id'] == activity_id else activity for activity in activities]
+
+    @staticmethod
+    def _with_status(activity, completed_activities):
+        return {
+            'activity_id': activity['activity_id'],
+            'name': activity['activity_name'],
+            'done': activity['activity_id'] in completed_activities,
+            'created_at': activity['created_at']
+        }
@@ -1,4 +1,4 @@
-from Model.class_model import ClassModel
+from Model.class_model import ClassModel, ENROLL_BATCH_SIZE
 from session_manager import SessionManager
 
 class ClassController:
@@ -15,20 +15,58 @@ class ClassController:
 
     def enroll_student_in_class(self, student_id, class_id):
         response = self.model.add_student_to_class(student_id, class_id)
-        if response is None:
+        if "error" in response:
             return {"error": "Failed to add student to class."}
         return {"success": f"Student {student_id} added to class {class_id}."}
 
+    def enroll_students_in_class(self, class_id, student_ids, batch_size=ENROLL_BATCH_SIZE):
+        results = self.model.add_students_to_class(class_id, student_ids, batch_size)
+        summary = {"enrolled": 0, "already_enrolled": 0, "error": 0}
+        for result in results:
+            summary[result["status"]] += 1
+        return {"results": results, **summary}
+
     def create_class(self, class_name, teacher_id):
         if not class_name.strip():
             raise ValueError("Class name cannot be empty.")
         return self.model.add_class(class_name, teacher_id)
 
-    def fetch_classes_for_teacher(self, teacher_id):
-        return self.model.get_classes_by_teacher(teacher_id)
+    def fetch_classes_for_teacher(self, teacher_id, on_refresh=None):
+        return self.model.get_classes_by_teacher(teacher_id, on_refresh=on_refresh)
+
+    def fetch_classes_for_student(self, student_id, on_refresh=None):
+        classes = self.model.get_classes_by_student(
+            student_id, on_refresh=on_refresh and (lambda refreshed: on_refresh(self._with_pending(student_id, refreshed)))
+        )
+        return self._with_pending(student_id, classes)
+
+    def _with_pending(self, student_id, classes):
+        # Enrollments still waiting in the outbox are listed as if they had been saved
+        if "error" in classes:
+            return classes
+        known = {class_info["id"] for class_info in classes}
+        pending = [
+            {"id": payload["id"], "class_name": payload["class_name"], "class_code": payload["class_code"]}
+            for payload in self.model.get_pending_enrollments(student_id)
+            if payload["id"] not in known
+        ]
+        return classes + pending
+
+    def watch_writes(self, listener):
+        self.model.outbox.add_listener(listener)
 
-    def fetch_classes_for_student(self, student_id):
-        return self.model.get_classes_by_student(student_id)
+    def unwatch_writes(self, listener):
+        self.model.outbox.remove_listener(listener)
+
+    def queue_enrollment(self, class_code, student_id):
+        # Looks the class up, then leaves the write to the outbox
+        class_data = self.fetch_class_by_code(class_code)
+        if "error" not in class_data:
+            self.model.queue_enrollment(student_id, class_data["id"], class_data["class_name"], class_code)
+        return class_data
+
+    def fetch_student_count(self, class_id):
+        return self.model.count_students_in_class(class_id)
 
     def get_student_id(self):
         # Get the student_id from the session
@@ -40,27 +78,18 @@ class ClassController:
     def add_class(self, class_code, student_id):
         try:
             # Check if the class_code exists in the database
-            response = self.model.client.table("classes").select("*").eq("class_code", class_code).execute()
+            class_data = self.model.get_class_by_code(class_code)
 
-            if not response.data:  # If no class is found with the given code
+            if not class_data:  # If no class is found with the given code
                 raise ValueError("Invalid class code.")
 
-            # Fetch class_name and class_id
-            class_data = response.data[0]
-            class_name = class_data["class_name"]
-            class_id = class_data["id"]
+            # Enroll through the same idempotent upsert used everywhere else
+            result = self.model.add_student_to_class(student_id, class_data["id"])
 
-            # Insert student and class relationship into the student_classes table
-            insert_response = self.model.client.table("student_classes").insert({
-                "student_id": student_id,
-                "class_id": class_id
-            }).execute()
-
-            if insert_response.data:
-                return f"Student successfully added to the class '{class_name}'."
+            if "error" not in result:
+                return f"Student successfully added to the class '{class_data['class_name']}'."
             else:
                 raise Exception("Failed to enroll the student in the class.")
 
         except Exception as e:
             return {"error": str(e)}
-
@@ -0,0 +1,160 @@
+import csv
+import os
+from Controller.class_controller import ClassController
+from Model.user_model import UserModel
+
+# Rows validated and enrolled per round trip
+ROSTER_CHUNK_SIZE = 500
+
+# Per-row problems kept in the report; the counters still cover every row
+MAX_REPORTED_ISSUES = 100
+
+
+class RosterController:
+    def __init__(self):
+        self.user_model = UserModel()
+        self.class_controller = ClassController()
+
+    def import_roster(self, path, class_id, on_progress=None, cancel_event=None, chunk_size=ROSTER_CHUNK_SIZE):
+        # Streams the file chunk by chunk, so memory use does not grow with the roster size.
+        # on_progress(report) is called from the calling thread after every chunk.
+        report = {
+            "status": "success",
+            "progress": 0.0,
+            "rows": 0,
+            "enrolled": 0,
+            "already_enrolled": 0,
+            "duplicates": 0,
+            "invalid": 0,
+            "errors": 0,
+            "issues": [],
+        }
+        seen = set()
+        try:
+            for rows, progress in self._read_chunks(path, chunk_size):
+                if cancel_event is not None and cancel_event.is_set():
+                    report["status"] = "cancelled"
+                    break
+                self._import_chunk(rows, class_id, seen, report)
+                report["progress"] = progress
+                if on_progress:
+                    on_progress(dict(report, issues=list(report["issues"])))
+            else:
+                report["progress"] = 1.0
+        except Exception as e:
+            report["status"] = "fail"
+            report["message"] = str(e)
+        return report
+
+    def _import_chunk(self, rows, class_id, seen, report):
+        candidates = {}
+        for row_number, student_id, last_name, first_name in rows:
+            report["rows"] += 1
+            if not student_id:
+                self._add_issue(report, "invalid", row_number, "Missing student ID.")
+            elif student_id in seen:
+                report["duplicates"] += 1
+            else:
+                seen.add(student_id)
+                candidates[student_id] = (row_number, last_name, first_name)
+
+        if not candidates:
+            return
+
+        try:
+            records = {str(record["student_id"]): record for record in self.user_model.get_student_records(candidates)}
+        except Exception as e:
+            for row_number, _, _ in candidates.values():
+                self._add_issue(report, "errors", row_number, f"Could not check student records: {e}")
+            return
+
+        valid = []
+        for student_id, (row_number, last_name, first_name) in candidates.items():
+            record = records.get(student_id)
+            if record is None:
+                self._add_issue(report, "invalid", row_number, f"Student {student_id} not found in records.")
+            elif (last_name and self._normalize(last_name) != self._normalize(record["last_name"])) or \
+                    (first_name and self._normalize(first_name) != self._normalize(record["first_name"])):
+                self._add_issue(report, "invalid", row_number, f"Name does not match records for {student_id}.")
+            else:
+                valid.append(student_id)
+
+        if not valid:
+            return
+
+        result = self.class_controller.enroll_students_in_class(class_id, valid, batch_size=len(valid))
+        report["enrolled"] += result["enrolled"]
+        report["already_enrolled"] += result["already_enrolled"]
+        for row in result["results"]:
+            if row["status"] == "error":
+                self._add_issue(report, "errors", candidates[row["student_id"]][0], row.get("message", "Enrollment failed."))
+
+    def _read_chunks(self, path, chunk_size):
+        rows = self._read_xlsx(path) if path.lower().endswith(".xlsx") else self._read_csv(path)
+        header = None
+        chunk = []
+        progress = 0.0
+        for row_number, values, progress in rows:
+            if header is None:
+                header = self._parse_header(values)
+                continue
+            if not any(value not in (None, "") for value in values):
+                continue
+            chunk.append((row_number,) + tuple(self._cell(values, header[column]) for column in ("student_id", "last_name", "first_name")))
+            if len(chunk) >= chunk_size:
+                yield chunk, progress
+                chunk = []
+        if chunk:
+            yield chunk, progress
+
+    @staticmethod
+    def _read_csv(path):
+        total_bytes = os.path.getsize(path) or 1
+        with open(path, newline="", encoding="utf-8-sig") as handle:
+            for row_number, values in enumerate(csv.reader(handle), start=1):
+                yield row_number, values, min(handle.buffer.tell() / total_bytes, 1.0)
+
+    @staticmethod
+    def _read_xlsx(path):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("Reading .xlsx rosters requires the openpyxl package; save the roster as CSV instead.")
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.active
+            total_rows = sheet.max_row or 1
+            for row_number, values in enumerate(sheet.iter_rows(values_only=True), start=1):
+                yield row_number, list(values), min(row_number / total_rows, 1.0)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _parse_header(values):
+        columns = {}
+        for index, value in enumerate(values):
+            name = "_".join(str(value or "").strip().lower().split())
+            columns.setdefault(name, index)
+        if "student_id" not in columns:
+            raise ValueError("Roster must have a 'student_id' column.")
+        return {column: columns.get(column) for column in ("student_id", "last_name", "first_name")}
+
+    @staticmethod
+    def _cell(values, index):
+        if index is None or index >= len(values) or values[index] is None:
+            return ""
+        value = values[index]
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)  # Spreadsheet IDs often come back as floats
+        return str(value).strip()
+
+    @staticmethod
+    def _normalize(name):
+        return " ".join(str(name or "").split()).casefold()
+
+    @staticmethod
+    def _add_issue(report, counter, row_number, message):
+        report[counter] += 1
+        if len(report["issues"]) < MAX_REPORTED_ISSUES:
+            report["issues"].append({"row": row_number, "message": message})
@@ -1,4 +1,6 @@
 from Model.user_model import UserModel
+from password_hasher import completed_future, then
+import hmac
 
 class UserController:
     def __init__(self):
@@ -7,6 +9,8 @@ class UserController:
     def validate_student(self, first_name,last_name, student_id):
         try:
             student = self.model.check_student_record(student_id, last_name, first_name)
+            if isinstance(student, dict):
+                return {"status": "fail", "message": f"An error occurred: {student['error']}"}
             if not student:
                 return {"status": "fail", "message": "Student not found in records. Registration denied."}
             return {"status": "success"}
@@ -15,13 +19,30 @@ class UserController:
 
     def validate_teacher(self, last_name, teacher_id, first_name):
         try:
-            student = self.model.check_student_record(teacher_id, last_name, first_name)
-            if not student:
-                return {"status": "fail", "message": "Student not found in records. Registration denied."}
+            teacher = self.model.check_teacher_record(last_name, teacher_id, first_name)
+            if isinstance(teacher, dict):
+                return {"status": "fail", "message": f"An error occurred: {teacher['error']}"}
+            if not teacher:
+                return {"status": "fail", "message": "Teacher not found in records. Registration denied."}
             return {"status": "success"}
         except Exception as e:
             return {"status": "fail", "message": f"An error occurred: {str(e)}"}
 
+    def validate_student_registration(self, first_name, last_name, student_id):
+        result = self.validate_user_id(student_id)
+        if result.get("status") == "fail":
+            return result
+        return self.validate_student(first_name, last_name, student_id)
+
+    def validate_teacher_registration(self, first_name, last_name, teacher_id):
+        result = self.validate_user_id(teacher_id)
+        if result.get("status") == "fail":
+            return result
+        return self.validate_teacher(last_name, teacher_id, first_name)
+
+    def prepare_registration(self, role):
+        self.model.prepare_record_checks(role)
+
     def validate_email(self, email):
         if not email or "@" not in email:
             return {"status": "fail", "message": "Invalid email format."}
@@ -51,59 +72,91 @@ class UserController:
             return {"status": "fail", "message": f"An error occurred: {str(e)}"}
 
     def register_student(self, first_name, last_name, student_id, email, password, password_code):
-        email_check = self.validate_email(email)
-        if email_check["status"] == "fail":
-            return email_check
-
-        id_check = self.validate_user_id(student_id)
-        if id_check["status"] == "fail":
-            return id_check
+        return self.register_student_async(first_name, last_name, student_id, email, password, password_code).result()
 
-        hashed_password = self.model.hash_password(password)
+    def register_student_async(self, first_name, last_name, student_id, email, password, password_code):
         data = {
             "first_name": first_name,
             "last_name": last_name,
             "student_id": student_id,
             "email": email,
-            "password": hashed_password,
             "password_code": password_code,
         }
-        result = self.model.insert_student(data)
-        if "error" in result:
-            return {"status": "fail", "message": result["error"]}
-        return {"status": "success", "message": "Student registered successfully!"}
+        return self._register_async(data, student_id, password, self.model.insert_student, "Student registered successfully!")
 
     def register_teacher(self, first_name, last_name, teacher_id, email, password, password_code):
-        email_check = self.validate_email(email)
-        if email_check["status"] == "fail":
-            return email_check
+        return self.register_teacher_async(first_name, last_name, teacher_id, email, password, password_code).result()
 
-        id_check = self.validate_user_id(teacher_id)
-        if id_check["status"] == "fail":
-            return id_check
-
-        hashed_password = self.model.hash_password(password)
+    def register_teacher_async(self, first_name, last_name, teacher_id, email, password, password_code):
         data = {
             "first_name": first_name,
             "last_name": last_name,
             "teacher_id": teacher_id,
             "email": email,
-            "password": hashed_password,
             "password_code": password_code,
         }
-        result = self.model.insert_teacher(data)
+        return self._register_async(data, teacher_id, password, self.model.insert_teacher, "Teacher registered successfully!")
+
+    def _register_async(self, data, user_id, password, insert, success_message):
+        email_check = self.validate_email(data["email"])
+        if email_check["status"] == "fail":
+            return completed_future(email_check)
+
+        id_check = self.validate_user_id(user_id)
+        if id_check["status"] == "fail":
+            return completed_future(id_check)
+
+        def insert_hashed(hash_future):
+            try:
+                result = insert(dict(data, password=hash_future.result()))
+            except Exception as e:
+                return {"status": "fail", "message": str(e)}
+            if isinstance(result, dict) and "error" in result:
+                return {"status": "fail", "message": result["error"]}
+            return {"status": "success", "message": success_message}
+
+        return then(self.model.hash_password_async(password), insert_hashed)
+
+    def fetch_student_name(self, student_id, on_refresh=None):
+        profile = self.model.get_student_profile(
+            student_id,
+            on_refresh=on_refresh and (lambda refreshed: on_refresh(self._full_name(refreshed))),
+        )
+        return self._full_name(profile)
+
+    @staticmethod
+    def _full_name(profile):
+        if not profile or "error" in profile:
+            return None
+        return f"{profile['first_name']} {profile['last_name']}"
+
+    def revalidate_session(self, role, user_id, credential):
+        # "valid" with a fresh profile, "invalid" once the account is gone or its password changed,
+        # "error" when it cannot be checked
+        result = self.model.get_session_profile(role, user_id)
         if "error" in result:
-            return {"status": "fail", "message": result["error"]}
-        return {"status": "success", "message": "Teacher registered successfully!"}
+            return {"status": "error", "message": result["error"]}
+        if result["status"] != "found" or not hmac.compare_digest(result["data"]["credential"], credential or ""):
+            return {"status": "invalid"}
+        return {
+            "status": "valid",
+            "profile": {"full_name": self._full_name(result["data"]), "email": result["data"]["email"]},
+        }
 
-    def request_password_reset(self, email):
-        return self.model.request_password_reset(email)
+    def request_password_reset(self, email, on_status=None):
+        # Returns once the code is queued; on_status(job) reports delivery from the mail thread
+        return self.model.request_password_reset(email, on_status=on_status)
 
     def login_account(self, email, password):
-        user = self.model.login_checker(email, password)
+        return self.login_account_async(email, password).result()
+
+    def login_account_async(self, email, password):
+        return then(self.model.login_checker_async(email, password), lambda future: self._login_result(future.result()))
 
+    @staticmethod
+    def _login_result(user):
         if user.get("status") != "found":
-            return {"status": "fail", "message": user.get("message", "User not found")}
+            return {"status": "fail", "message": user.get("message", "User not found"), "timings": user.get("timings", {})}
 
         teacher_id = user.get("teacher_id") if user["role"] == "teacher" else None
 
@@ -114,4 +167,6 @@ class UserController:
             "student_id": user.get("student_id"),
             "teacher_id": teacher_id,  # Include teacher_id for teachers
             "role": user["role"],
+            "credential": user["credential"],
+            "timings": user.get("timings", {}),
         }
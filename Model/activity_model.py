@@ -0,0 +1,235 @@
+import os
+from supabase_manager import get_supabase_client
+from query_cache import QueryCache
+from realtime_manager import RealtimeManager
+from write_outbox import WriteOutbox
+from datetime import datetime
+
+# Cleared after the first failed call when class_progress is not deployed (see sql/class_progress.sql)
+_progress_rpc_available = True
+
+# Cleared when activity_student has no unique (activity_id, student_id) index (see sql/activity_student_unique.sql)
+_completion_upsert_available = True
+
+STATUS_WRITES = "activity_status"
+
+# Toggles made within this many seconds of each other are sent as one insert and one delete
+STATUS_WRITE_WINDOW = float(os.environ.get("STATUS_WRITE_WINDOW", "1.5"))
+
+
+def _coalesce_status(pending, new):
+    # Checking and unchecking before the first write is sent leaves nothing to send
+    if pending["done"] != new["done"]:
+        return None
+    return new
+
+class ActivityModel:
+    def __init__(self):
+        self.client = get_supabase_client()
+        self.cache = QueryCache()
+        self.realtime = RealtimeManager()
+        self.outbox = WriteOutbox()
+        self.outbox.register_handler(
+            STATUS_WRITES, self.flush_statuses, coalesce=_coalesce_status, delay=STATUS_WRITE_WINDOW
+        )
+
+    def get_activities(self, class_id, on_refresh=None, fresh=False):
+        return self.cache.get(
+            "activity_table",
+            {"class_id": class_id},
+            lambda: self.client.table('activity_table').select('*').eq('class_id', class_id).execute().data,
+            on_refresh=on_refresh,
+            fresh=fresh,
+        )
+
+    def get_activity_ids(self, class_id):
+        # Small per-class id set that completion queries are scoped to
+        return self.cache.get(
+            "activity_table",
+            {"class_id": class_id},
+            lambda: [item['activity_id'] for item in self.client.table('activity_table')
+                     .select('activity_id')
+                     .eq('class_id', class_id)
+                     .execute().data],
+            columns="activity_id",
+        )
+
+    def get_completed_activity_ids(self, student_id, class_id, activity_ids=None, on_refresh=None, fresh=False):
+        # Only completions for this class's activities are fetched, so the payload follows the
+        # class size instead of the student's whole history
+        def fetch():
+            ids = self.get_activity_ids(class_id) if activity_ids is None else list(activity_ids)
+            if not ids:
+                return []
+            return [item['activity_id'] for item in self.client.table('activity_student')
+                    .select('activity_id')
+                    .eq('student_id', student_id)
+                    .in_('activity_id', ids)
+                    .execute().data]
+
+        return self.cache.get(
+            "activity_student",
+            {"student_id": student_id, "class_id": class_id},
+            fetch,
+            on_refresh=on_refresh,
+            columns="activity_id",
+            fresh=fresh,
+        )
+
+    def mark_complete(self, activity_id, student_id):
+        response = self.client.table('activity_student').insert({
+            'activity_id': activity_id,
+            'student_id': student_id,
+            'checked_at': datetime.now().isoformat()
+        }).execute()
+        self.cache.invalidate("activity_student", student_id=student_id)
+        return response.data
+
+    def mark_incomplete(self, activity_id, student_id):
+        response = self.client.table('activity_student')\
+            .delete()\
+            .eq('activity_id', activity_id)\
+            .eq('student_id', student_id)\
+            .execute()
+        self.cache.invalidate("activity_student", student_id=student_id)
+        return response.data
+
+    def queue_status(self, activity_id, student_id, done):
+        # Stored on the device first and written to Supabase in order by the outbox
+        self.outbox.enqueue(
+            STATUS_WRITES,
+            f"{activity_id}:{student_id}",
+            {"activity_id": activity_id, "student_id": student_id, "done": done, "checked_at": datetime.now().isoformat()},
+        )
+
+    def get_pending_statuses(self, student_id):
+        # {activity_id: done} for writes that have not reached the server yet
+        return {
+            payload["activity_id"]: payload["done"]
+            for payload in self.outbox.pending(STATUS_WRITES)
+            if payload["student_id"] == student_id
+        }
+
+    def flush_statuses(self, payloads):
+        # Called by the outbox with queued writes in order: the last one per activity wins,
+        # then one insert for every completion and one delete per student for the rest
+        latest = {}
+        for payload in payloads:
+            latest[(payload["activity_id"], payload["student_id"])] = payload
+
+        completed = [
+            {"activity_id": p["activity_id"], "student_id": p["student_id"], "checked_at": p["checked_at"]}
+            for p in latest.values() if p["done"]
+        ]
+        cleared = {}
+        for p in latest.values():
+            if not p["done"]:
+                cleared.setdefault(p["student_id"], []).append(p["activity_id"])
+
+        if completed:
+            self._insert_completions(completed)
+        for student_id, activity_ids in cleared.items():
+            self.client.table('activity_student')\
+                .delete()\
+                .eq('student_id', student_id)\
+                .in_('activity_id', activity_ids)\
+                .execute()
+
+        for student_id in {p["student_id"] for p in latest.values()}:
+            self.cache.invalidate("activity_student", student_id=student_id)
+
+    def _insert_completions(self, rows):
+        global _completion_upsert_available
+        # Replays must not duplicate rows, so completions are upserted on (activity_id, student_id)
+        if _completion_upsert_available:
+            try:
+                self.client.table('activity_student').upsert(
+                    rows, on_conflict="activity_id,student_id", ignore_duplicates=True
+                ).execute()
+                return
+            except Exception as e:
+                # 42P10: no unique index matches the conflict target
+                if getattr(e, "code", None) != "42P10":
+                    raise
+                print(f"activity_student has no unique index, clearing before insert: {e}")
+                _completion_upsert_available = False
+
+        by_student = {}
+        for row in rows:
+            by_student.setdefault(row["student_id"], []).append(row["activity_id"])
+        for student_id, activity_ids in by_student.items():
+            self.client.table('activity_student')\
+                .delete()\
+                .eq('student_id', student_id)\
+                .in_('activity_id', activity_ids)\
+                .execute()
+        self.client.table('activity_student').insert(rows).execute()
+
+    def get_class_progress(self, student_id, class_ids, on_refresh=None):
+        # {class_id: {"completed": n, "total": n}} for every requested class, in one round trip when possible
+        class_ids = list(class_ids)
+        return self.cache.get(
+            "activity_student",
+            {"student_id": student_id, "class_id": class_ids},
+            lambda: self._fetch_class_progress(student_id, class_ids),
+            on_refresh=on_refresh,
+            columns="progress",
+        )
+
+    def _fetch_class_progress(self, student_id, class_ids):
+        global _progress_rpc_available
+        progress = {class_id: {"completed": 0, "total": 0} for class_id in class_ids}
+        if not class_ids:
+            return progress
+
+        if _progress_rpc_available:
+            try:
+                rows = self.client.rpc("class_progress", {"p_student_id": student_id, "p_class_ids": class_ids}).execute().data
+                for row in rows:
+                    progress[row["class_id"]] = {"completed": row["completed"], "total": row["total"]}
+                return progress
+            except Exception as e:
+                # Only a missing function turns the RPC off; anything else (e.g. a network error)
+                # falls back to count requests for this call and the RPC is tried again next time
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                if getattr(e, "code", None) == "PGRST202" or status == 404:
+                    print(f"class_progress RPC not deployed, using count requests: {e}")
+                    _progress_rpc_available = False
+                else:
+                    print(f"class_progress RPC failed, using count requests once: {e}")
+
+        for class_id in class_ids:
+            progress[class_id] = self._count_class_progress(student_id, class_id)
+        return progress
+
+    def _count_class_progress(self, student_id, class_id):
+        # Only the class's activity ids (usually cached) are downloaded; completions are counted
+        # on the server without transferring any rows
+        activity_ids = self.get_activity_ids(class_id)
+        if not activity_ids:
+            return {"completed": 0, "total": 0}
+        completed = self.client.table('activity_student')\
+            .select('activity_id', count='exact', head=True)\
+            .eq('student_id', student_id)\
+            .in_('activity_id', activity_ids)\
+            .execute().count
+        return {"completed": completed or 0, "total": len(activity_ids)}
+
+    def subscribe_activities(self, class_id, callback, on_status=None):
+        # Filtered subscriptions on hosted Supabase never receive DELETE events; callers must
+        # reconcile periodically (CourseDetail keeps a slow poll running while subscribed)
+        def changed(change):
+            self.cache.invalidate("activity_table", class_id=class_id)
+            # Progress entries are keyed by class as well as student
+            self.cache.invalidate("activity_student", class_id=class_id)
+            callback(change)
+        return self.realtime.subscribe("activity_table", changed, filter=f"class_id=eq.{class_id}", on_status=on_status)
+
+    def subscribe_completions(self, student_id, callback, on_status=None):
+        def changed(change):
+            self.cache.invalidate("activity_student", student_id=student_id)
+            callback(change)
+        return self.realtime.subscribe("activity_student", changed, filter=f"student_id=eq.{student_id}", on_status=on_status)
+
+    def unsubscribe(self, subscription):
+        self.realtime.unsubscribe(subscription)
@@ -1,13 +1,27 @@
 from supabase_manager import get_supabase_client
-import random
+from query_cache import QueryCache
+from write_outbox import WriteOutbox
+import secrets
 import string
 
+# A colliding random code is rejected by the insert and retried with a new one
+CLASS_CODE_ATTEMPTS = 5
+
+# Rows per upsert request when enrolling a whole roster
+ENROLL_BATCH_SIZE = 500
+
+ENROLLMENT_WRITES = "enrollment"
+
 class ClassModel:
     def __init__(self):
         self.client = get_supabase_client()
+        self.cache = QueryCache()
+        self.outbox = WriteOutbox()
+        # Enrolling twice is harmless, so repeated requests simply keep the latest one
+        self.outbox.register_handler(ENROLLMENT_WRITES, self.flush_enrollments, coalesce=lambda pending, new: new)
 
     def generate_class_code(self):
-        return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+        return ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(6))
 
     def get_class_by_code(self, class_code):
         response = self.client.table("classes").select("id", "class_name").eq("class_code",
@@ -18,77 +32,167 @@ class ClassModel:
             return None
 
     def add_student_to_class(self, student_id, class_id):
-        existing_entry = self.client.table("student_classes").select("*").eq("student_id", student_id).eq("class_id",
-                                                                                                          class_id).execute()
-
-        if existing_entry.data:
-            print(f"Class {class_id} already added for student {student_id}")
-        else:
-            # Proceed to insert the record if not already present
-            response = self.client.table("student_classes").insert({
-                "student_id": student_id,
-                "class_id": class_id
-            }).execute()
+        # One idempotent upsert on (student_id, class_id) instead of a lookup followed by an insert.
+        # Needs the unique index from sql/student_classes_unique.sql
+        try:
+            response = self.client.table("student_classes").upsert(
+                {"student_id": student_id, "class_id": class_id},
+                on_conflict="student_id,class_id",
+                ignore_duplicates=True,
+            ).execute()
+        except Exception as e:
+            print(f"Error: {e}")
+            return {"error": str(e)}
 
-            if response.data:
-                print(f"Successfully added student {student_id} to class {class_id}")
-            else:
-                print(f"Error: {response.error}")
+        self.cache.invalidate("student_classes", student_id=student_id)
+        if response.data:
+            print(f"Successfully added student {student_id} to class {class_id}")
+            return {"status": "enrolled"}
+        print(f"Class {class_id} already added for student {student_id}")
+        return {"status": "already_enrolled"}
+
+    def queue_enrollment(self, student_id, class_id, class_name, class_code):
+        # The class details are kept with the write so the course can be shown before it is sent
+        self.outbox.enqueue(
+            ENROLLMENT_WRITES,
+            f"{student_id}:{class_id}",
+            {"student_id": student_id, "id": class_id, "class_name": class_name, "class_code": class_code},
+        )
+
+    def get_pending_enrollments(self, student_id):
+        return [payload for payload in self.outbox.pending(ENROLLMENT_WRITES) if payload["student_id"] == student_id]
+
+    def flush_enrollments(self, payloads):
+        # One upsert for every queued enrollment; raises so the outbox retries the batch
+        rows = list({
+            (payload["student_id"], payload["id"]): {"student_id": payload["student_id"], "class_id": payload["id"]}
+            for payload in payloads
+        }.values())
+        self.client.table("student_classes").upsert(
+            rows, on_conflict="student_id,class_id", ignore_duplicates=True
+        ).execute()
+        for student_id in {row["student_id"] for row in rows}:
+            self.cache.invalidate("student_classes", student_id=student_id)
+
+    def add_students_to_class(self, class_id, student_ids, batch_size=ENROLL_BATCH_SIZE):
+        student_ids = list(dict.fromkeys(student_ids))
+        results = []
+        for start in range(0, len(student_ids), batch_size):
+            batch = student_ids[start:start + batch_size]
+            try:
+                response = self.client.table("student_classes").upsert(
+                    [{"student_id": student_id, "class_id": class_id} for student_id in batch],
+                    on_conflict="student_id,class_id",
+                    ignore_duplicates=True,
+                ).execute()
+            except Exception as e:
+                results.extend({"student_id": student_id, "status": "error", "message": str(e)} for student_id in batch)
+                continue
+
+            # Only newly inserted rows come back, everything else was already enrolled
+            inserted = {str(row["student_id"]) for row in response.data}
+            for student_id in batch:
+                status = "enrolled" if str(student_id) in inserted else "already_enrolled"
+                results.append({"student_id": student_id, "status": status})
+
+        if student_ids:
+            self.cache.invalidate("student_classes", class_id=class_id)
+        return results
 
     def add_class(self, class_name, teacher_id):
         try:
             if not class_name.strip():
                 raise ValueError("Class name cannot be empty.")
 
-            # Check if a class with the same name already exists
-            response = self.client.table("classes").select("*").eq("class_name", class_name).execute()
-
-            if response.data:  # If data exists, the class name already exists
+            # Checked here as well so a database without sql/classes_unique.sql still refuses
+            # duplicates; the constraint covers two teachers creating the same name at once
+            response = self.client.table("classes").select("id").eq("class_name", class_name).limit(1).execute()
+            if response.data:
                 raise ValueError("Class name already exists.")
 
-            # Ensure class code is unique
-            while True:
+            # The unique constraints from sql/classes_unique.sql are checked by the insert itself
+            for _ in range(CLASS_CODE_ATTEMPTS):
                 class_code = self.generate_class_code()
-                response = self.client.table("classes").select("*").eq("class_code", class_code).execute()
-
-                if not response.data:  # Check if no data is returned
-                    break
-
-            # Insert class into the classes table
-            response = self.client.table("classes").insert({
-                "class_name": class_name,
-                "class_code": class_code,
-                "teacher_id": teacher_id
-            }).execute()
-
-            # Instead of response.error, inspect response structure
-            if hasattr(response, "data") and response.data:
-                return class_code  # Return the class code if insertion was successful
-            else:
+                try:
+                    response = self.client.table("classes").insert({
+                        "class_name": class_name,
+                        "class_code": class_code,
+                        "teacher_id": teacher_id
+                    }).execute()
+                except Exception as e:
+                    conflict = self._unique_violation(e)
+                    if conflict == "class_name":
+                        raise ValueError("Class name already exists.")
+                    if conflict == "class_code":
+                        continue
+                    raise
+
+                # Instead of response.error, inspect response structure
+                if hasattr(response, "data") and response.data:
+                    self.cache.invalidate("classes", teacher_id=teacher_id)
+                    return class_code  # Return the class code if insertion was successful
                 raise Exception(f"Unexpected response structure: {response}")
 
+            raise Exception("Could not allocate a unique class code.")
+
         except Exception as e:
             return {"error": str(e)}
 
-    def get_classes_by_teacher(self, teacher_id):
+    @staticmethod
+    def _unique_violation(error):
+        # Postgres reports unique violations as 23505 with "Key (column)=(value) already exists."
+        if getattr(error, "code", None) != "23505":
+            return None
+        details = f"{getattr(error, 'details', '')} {getattr(error, 'message', '')}"
+        for column in ("class_code", "class_name"):
+            if column in details:
+                return column
+        return None
+
+    def get_classes_by_teacher(self, teacher_id, on_refresh=None):
         try:
-            response = self.client.table("classes").select("*").eq("teacher_id", teacher_id).execute()
+            classes = self.cache.get(
+                "classes",
+                {"teacher_id": teacher_id},
+                lambda: self.client.table("classes").select("*").eq("teacher_id", teacher_id).execute().data,
+                on_refresh=on_refresh,
+            )
 
-            if response.data is None or isinstance(response.data, list) and not response.data:
-                raise Exception(f"Failed to fetch classes: {response.error or 'No classes found.'}")
+            if not classes:
+                raise Exception("Failed to fetch classes: No classes found.")
 
-            return response.data
+            return classes
         except Exception as e:
             return {"error": str(e)}
 
-    def get_classes_by_student(self, student_id):
+    def get_classes_by_student(self, student_id, on_refresh=None):
         try:
-            response = self.client.table("student_classes").select("*").eq("student_id", student_id).execute()
-            if response is None or isinstance(response, list) and not response:
-                raise Exception(f"Failed to fetch classes: {response.error or 'No classes found.'}")
+            return self.cache.get(
+                "student_classes",
+                {"student_id": student_id},
+                lambda: self._fetch_classes_by_student(student_id),
+                on_refresh=on_refresh,
+                columns="classes",
+            )
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _fetch_classes_by_student(self, student_id):
+        enrollments = self.client.table("student_classes").select("class_id").eq("student_id", student_id).execute()
+        class_ids = list(dict.fromkeys(row["class_id"] for row in enrollments.data))
+        if not class_ids:
+            return []
+
+        # One batched lookup for every enrolled class instead of a query per class
+        response = self.client.table("classes").select("id, class_name, class_code").in_("id", class_ids).execute()
+        classes_by_id = {class_info["id"]: class_info for class_info in response.data}
 
-            return response
+        return [classes_by_id[class_id] for class_id in class_ids if class_id in classes_by_id]
 
+    def count_students_in_class(self, class_id):
+        try:
+            # Count-only request: no roster rows are transferred
+            response = self.client.table("student_classes").select("*", count="exact", head=True).eq("class_id", class_id).execute()
+            return response.count or 0
         except Exception as e:
             return {"error": str(e)}
-
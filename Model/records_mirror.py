@@ -0,0 +1,228 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from local_storage import get_data_path
+from supabase_manager import get_backend_fingerprint, get_supabase_client
+
+# Off by default: the snapshot holds the id and name of every school record, so it is only
+# worth keeping (RECORDS_MIRROR=1) on shared registration kiosks, not on personal devices
+RECORDS_MIRROR_ENABLED = os.environ.get("RECORDS_MIRROR", "0") == "1"
+
+# Snapshots older than this are not trusted and are refreshed in the background
+RECORDS_MIRROR_MAX_AGE = float(os.environ.get("RECORDS_MIRROR_MAX_AGE", "900"))
+
+# Deltas cannot see deleted records, so the snapshot is rebuilt from scratch this often
+RECORDS_MIRROR_FULL_SYNC = float(os.environ.get("RECORDS_MIRROR_FULL_SYNC", "86400"))
+
+# Server column bumped whenever a record row changes; without it every refresh is a full sync
+RECORDS_DELTA_COLUMN = os.environ.get("RECORDS_DELTA_COLUMN", "updated_at")
+
+RECORDS_PAGE_SIZE = 1000
+
+# kind -> (server table, id column)
+RECORD_TABLES = {
+    "student": ("student_records", "student_id"),
+    "teacher": ("teacher_records", "teacher_id"),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    last_name TEXT,
+    first_name TEXT,
+    PRIMARY KEY (kind, record_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync_state (
+    kind TEXT PRIMARY KEY,
+    synced_at REAL,
+    full_synced_at REAL,
+    cursor TEXT
+);
+"""
+
+
+def normalize_name(name):
+    return " ".join(str(name or "").split()).casefold()
+
+
+def names_match(record, last_name, first_name):
+    return (
+        normalize_name(record.get("last_name")) == normalize_name(last_name)
+        and normalize_name(record.get("first_name")) == normalize_name(first_name)
+    )
+
+
+class RecordsMirror:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._instance_lock:
+            if not cls._instance:
+                cls._instance = super(RecordsMirror, cls).__new__(cls, *args, **kwargs)
+                cls._instance.enabled = RECORDS_MIRROR_ENABLED
+                cls._instance.connection = None
+                cls._instance.lock = threading.Lock()
+                cls._instance.refreshing = set()
+                cls._instance.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="records-mirror")
+                cls._instance.stats = {"hits": 0, "misses": 0, "stale": 0, "refreshes": 0, "rows_synced": 0, "failures": 0}
+        return cls._instance
+
+    def contains(self, kind, record_id, last_name, first_name):
+        # True when the snapshot confirms the record; None means "ask the server".
+        # Misses are never final, since the record may have been added after the last sync,
+        # and they do not trigger a sync: the caller's single server lookup answers them.
+        if not self.enabled:
+            return None
+        try:
+            with self.lock:
+                connection = self._connect()
+                state = connection.execute("SELECT synced_at FROM sync_state WHERE kind = ?", (kind,)).fetchone()
+                if state is None or time.time() - state[0] > RECORDS_MIRROR_MAX_AGE:
+                    self.stats["stale"] += 1
+                    row = None
+                    stale = True
+                else:
+                    row = connection.execute(
+                        "SELECT last_name, first_name FROM records WHERE kind = ? AND record_id = ?",
+                        (kind, str(record_id).strip()),
+                    ).fetchone()
+                    stale = False
+        except sqlite3.Error as e:
+            print(f"Error reading records mirror: {e}")
+            return None
+
+        if not stale and row is not None and names_match(dict(row), last_name, first_name):
+            with self.lock:
+                self.stats["hits"] += 1
+            return True
+
+        if not stale:
+            with self.lock:
+                self.stats["misses"] += 1
+        return None
+
+    def refresh_async(self, kind=None):
+        kinds = [kind] if kind else list(RECORD_TABLES)
+        with self.lock:
+            kinds = [k for k in kinds if k not in self.refreshing]
+            self.refreshing.update(kinds)
+        for k in kinds:
+            self.executor.submit(self._refresh_in_background, k)
+
+    def refresh(self, kind):
+        client = get_supabase_client()
+        with self.lock:
+            state = self._connect().execute(
+                "SELECT full_synced_at, cursor FROM sync_state WHERE kind = ?", (kind,)
+            ).fetchone()
+
+        if state is None or state[1] is None or time.time() - state[0] > RECORDS_MIRROR_FULL_SYNC:
+            return self._full_sync(client, kind)
+        try:
+            return self._delta_sync(client, kind, state[1])
+        except Exception as e:
+            print(f"Delta sync of {kind} records failed, rebuilding snapshot: {e}")
+            return self._full_sync(client, kind)
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, enabled=self.enabled)
+
+    def _refresh_in_background(self, kind):
+        try:
+            self.refresh(kind)
+        except Exception as e:
+            with self.lock:
+                self.stats["failures"] += 1
+            print(f"Error refreshing {kind} records mirror: {e}")
+        finally:
+            with self.lock:
+                self.refreshing.discard(kind)
+
+    def _full_sync(self, client, kind):
+        table, id_column = RECORD_TABLES[kind]
+        delta_column = RECORDS_DELTA_COLUMN
+        try:
+            rows = self._fetch_all(client, table, id_column, delta_column)
+        except Exception:
+            # The server table has no delta column; keep working with full syncs only
+            delta_column = None
+            rows = self._fetch_all(client, table, id_column, None)
+
+        cursor = max((str(row[delta_column]) for row in rows if row.get(delta_column)), default=None) if delta_column else None
+        with self.lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM records WHERE kind = ?", (kind,))
+                self._store_rows(connection, kind, id_column, rows)
+                now = time.time()
+                connection.execute(
+                    "INSERT OR REPLACE INTO sync_state (kind, synced_at, full_synced_at, cursor) VALUES (?, ?, ?, ?)",
+                    (kind, now, now, cursor),
+                )
+            self.stats["refreshes"] += 1
+            self.stats["rows_synced"] += len(rows)
+        return len(rows)
+
+    def _delta_sync(self, client, kind, cursor):
+        table, id_column = RECORD_TABLES[kind]
+        rows = (
+            client.table(table)
+            .select(f"{id_column}, last_name, first_name, {RECORDS_DELTA_COLUMN}")
+            .gt(RECORDS_DELTA_COLUMN, cursor)
+            .order(RECORDS_DELTA_COLUMN)
+            .execute()
+            .data
+        )
+        if rows:
+            cursor = max(str(row[RECORDS_DELTA_COLUMN]) for row in rows)
+        with self.lock:
+            connection = self._connect()
+            with connection:
+                self._store_rows(connection, kind, id_column, rows)
+                connection.execute(
+                    "UPDATE sync_state SET synced_at = ?, cursor = ? WHERE kind = ?", (time.time(), cursor, kind)
+                )
+            self.stats["refreshes"] += 1
+            self.stats["rows_synced"] += len(rows)
+        return len(rows)
+
+    @staticmethod
+    def _fetch_all(client, table, id_column, delta_column):
+        # Keyset pagination, so large record tables are never fetched in a single response
+        columns = f"{id_column}, last_name, first_name" + (f", {delta_column}" if delta_column else "")
+        rows = []
+        last_id = None
+        while True:
+            query = client.table(table).select(columns).order(id_column).limit(RECORDS_PAGE_SIZE)
+            if last_id is not None:
+                query = query.gt(id_column, last_id)
+            page = query.execute().data
+            rows.extend(page)
+            if len(page) < RECORDS_PAGE_SIZE:
+                return rows
+            last_id = page[-1][id_column]
+
+    @staticmethod
+    def _store_rows(connection, kind, id_column, rows):
+        # Names are stored normalized, so lookups only need the primary key
+        connection.executemany(
+            "INSERT OR REPLACE INTO records (kind, record_id, last_name, first_name) VALUES (?, ?, ?, ?)",
+            [
+                (kind, str(row[id_column]).strip(), normalize_name(row.get("last_name")), normalize_name(row.get("first_name")))
+                for row in rows
+            ],
+        )
+
+    def _connect(self):
+        # Called with the lock held; one snapshot file per backend so switching projects never mixes records
+        if self.connection is None:
+            self.connection = sqlite3.connect(get_data_path(f"records_{get_backend_fingerprint()}.db"), check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(SCHEMA)
+        return self.connection
@@ -1,19 +1,33 @@
 from supabase_manager import get_supabase_client
-import bcrypt
+from query_cache import QueryCache
+from Model.records_mirror import RecordsMirror, names_match
+from password_hasher import PasswordHasher, completed_future, then
+from mail_dispatcher import MailDispatcher
+from concurrent.futures import Future, ThreadPoolExecutor
+import hashlib
 import random
-import smtplib
-from email.mime.text import MIMEText
+import time
+
+# (role, table, id column) in lookup priority order
+USER_TABLES = [("teacher", "teacher_table", "teacher_id"), ("student", "student_table", "student_id")]
+USER_TABLE_NAMES = {role: table for role, table, _ in USER_TABLES}
+
+# Only what verify_password and the session need
+LOGIN_FIELDS = "first_name, last_name, email, password"
+
+_lookup_executor = ThreadPoolExecutor(max_workers=len(USER_TABLES), thread_name_prefix="user-lookup")
 
 class UserModel:
     def __init__(self):
         self.client = get_supabase_client()
+        self.cache = QueryCache()
+        self.records = RecordsMirror()
 
     def generate_code(self):
         return str(random.randint(1000, 9999))
 
-    def send_code_to_email(self, email, code):
-        sender_email = "jiroluismanalo24@gmail.com"
-        sender_password = "onpc xdvm svqx axhb"
+    def send_code_to_email(self, email, code, on_status=None):
+        # Queued on the mail dispatcher; on_status(job) follows it until it is sent or has failed
         subject = "Password Recovery Code"
 
         body = f"""
@@ -55,25 +69,13 @@ class UserModel:
         </body></html>
         """
 
-        msg = MIMEText(body, "html")
-        msg['Subject'] = subject
-        msg['From'] = sender_email
-        msg['To'] = email
-
-        try:
-            with smtplib.SMTP('smtp.gmail.com', 587) as server:
-                server.starttls()
-                server.login(sender_email, sender_password)
-                server.sendmail(sender_email, email, msg.as_string())
-            return {"status": "success", "message": "Code sent to email."}
-        except Exception as e:
-            return {"status": "fail", "message": str(e)}
+        return MailDispatcher().send(email, subject, body, on_status=on_status)
 
-    def request_password_reset(self, email):
+    def request_password_reset(self, email, on_status=None):
         email_check_result = self.check_email(email)
         if email_check_result["status"] == "found":
             code = self.generate_code()
-            self.send_code_to_email(email, code)
+            self.send_code_to_email(email, code, on_status=on_status)
             return {"status": "success", "code": code}  # Store this code temporarily
         else:
             return {"status": "fail", "message": "Email not found."}
@@ -84,6 +86,7 @@ class UserModel:
         # hashed_password = self.hash_password(new_password)
         try:
             response = self.client.table("student_table").update({"password": new_password}).eq("email", email).execute()
+            self.cache.invalidate("student_table", email=email)
             print(response)
             return response
             # if response.data:
@@ -93,99 +96,185 @@ class UserModel:
         except Exception as e:
             return {"error": str(e)}
 
-    def check_student_record(self, student_id, last_name, first_name):
+    def get_student_profile(self, student_id, on_refresh=None):
         try:
-            response = (
-                self.client.table("student_records")
-                .select("*")
-                .eq("student_id", student_id)
-                .eq("last_name", last_name)
-                .eq("first_name", first_name)
-                .execute()
+            profiles = self.cache.get(
+                "student_table",
+                {"student_id": student_id},
+                lambda: self.client.table("student_table").select("first_name, last_name").eq("student_id", student_id).execute().data,
+                on_refresh=on_refresh and (lambda rows: on_refresh(rows[0] if rows else None)),
+                columns="first_name, last_name",
             )
-            return len(response.data) > 0
+            return profiles[0] if profiles else None
+        except Exception as e:
+            return {"error": str(e)}
+
+    def get_session_profile(self, role, user_id):
+        # Uncached: used to confirm that a saved login still belongs to an existing account
+        # and that its password has not changed since
+        try:
+            rows = self.client.table(USER_TABLE_NAMES[role])\
+                .select("first_name, last_name, email, password")\
+                .eq(f"{role}_id", user_id)\
+                .execute().data
+            if not rows:
+                return {"status": "not_found"}
+            profile = dict(rows[0])
+            profile["credential"] = self.credential_fingerprint(profile.pop("password", None) or "")
+            return {"status": "found", "data": profile}
         except Exception as e:
             return {"error": str(e)}
 
+    @staticmethod
+    def credential_fingerprint(stored_hash):
+        # Saved with the session instead of the hash itself; any password change alters it
+        return hashlib.sha256(stored_hash.encode("utf-8")).hexdigest()
+
+    def check_student_record(self, student_id, last_name, first_name):
+        return self._check_record("student", "student_records", "student_id", student_id, last_name, first_name)
+
+    def get_student_records(self, student_ids):
+        # Batched lookup used by the roster import instead of one check_student_record per row
+        response = (
+            self.client.table("student_records")
+            .select("student_id, last_name, first_name")
+            .in_("student_id", list(student_ids))
+            .execute()
+        )
+        return response.data
+
+    def prepare_record_checks(self, kind):
+        # Brings the optional records snapshot up to date while a registration form is open
+        if self.records.enabled:
+            self.records.refresh_async(kind)
+
     def check_teacher_record(self, last_name, teacher_id, first_name):
+        return self._check_record("teacher", "teacher_records", "teacher_id", teacher_id, last_name, first_name)
+
+    def _check_record(self, kind, table, id_column, record_id, last_name, first_name):
+        # The local snapshot answers known records without a round trip; anything else goes to the server
+        if self.records.contains(kind, record_id, last_name, first_name):
+            return True
         try:
-            response = (
-                self.client.table("teacher_records")
-                .select("*")
-                .eq("teacher_id", teacher_id)
-                .eq("last_name", last_name)
-                .eq("first_name", first_name)
-                .execute()
-            )
-            return response.data
+            response = self.client.table(table).select("last_name, first_name").eq(id_column, record_id).execute()
+            return any(names_match(record, last_name, first_name) for record in response.data)
         except Exception as e:
             return {"error": str(e)}
 
     def check_user_id(self, user_id):
         try:
-            teacher_response = self.client.table("teacher_table").select("*").eq("teacher_id", user_id).execute()
-            student_response = self.client.table("student_table").select("*").eq("student_id", user_id).execute()
-
-            if teacher_response.data:
-                return {"status": "found", "role": "teacher", "data": teacher_response.data}
-            elif student_response.data:
-                return {"status": "found", "role": "student", "data": student_response.data}
-            else:
-                return {"status": "not_found", "message": "ID not found in records."}
+            # Each table is matched on its own id column, both in a single round trip
+            futures = [
+                (role, _lookup_executor.submit(self._select_user, table, id_column, id_column, user_id))
+                for role, table, id_column in USER_TABLES
+            ]
+            for role, future in futures:
+                rows = future.result()
+                if rows:
+                    return {"status": "found", "role": role, "data": rows}
+            return {"status": "not_found", "message": "ID not found in records."}
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
     def check_email(self, email):
         try:
-            teacher_response = self.client.table("teacher_table").select("*").eq("email", email).execute()
-            student_response = self.client.table("student_table").select("*").eq("email", email).execute()
-
-            if teacher_response.data:
-                return {"status": "found", "role": "teacher", "data": teacher_response.data}
-            elif student_response.data:
-                return {"status": "found", "role": "student", "data": student_response.data}
-            else:
-                return {"status": "not_found", "message": "Email not found in records."}
+            role, _, user = self.find_user("email", email, "email")
+            if user:
+                return {"status": "found", "role": role, "data": [user]}
+            return {"status": "not_found", "message": "Email not found in records."}
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    def find_user(self, column, value, fields):
+        # Both tables are queried concurrently, so a lookup costs a single round trip
+        futures = [
+            (role, id_column, _lookup_executor.submit(self._select_user, table, f"{id_column}, {fields}", column, value))
+            for role, table, id_column in USER_TABLES
+        ]
+        results = [(role, id_column, future.result()) for role, id_column, future in futures]
+        for role, id_column, rows in results:
+            if rows:
+                return role, id_column, rows[0]
+        return None, None, None
+
+    def _select_user(self, table, columns, column, value):
+        return self.client.table(table).select(columns).eq(column, value).execute().data
+
     def login_checker(self, email, password):
+        return self.login_checker_async(email, password).result()
+
+    def login_checker_async(self, email, password):
+        # The lookup runs on the calling thread; bcrypt runs on the hasher pool
         try:
-            for role, table in [("teacher", "teacher_table"), ("student", "student_table")]:
-                print(role, table)
-                response = self.client.table(table).select("*").eq("email", email).execute()
-                if response.data:
-                    user = response.data[0]
-                    if self.verify_password(password, user.get("password")):
-                        # Check the role and fetch either student_id or teacher_id
-                        if role == "teacher":
-                            teacher_id = user.get("teacher_id", None)
-                            return {
-                                "status": "found",
-                                "role": role,
-                                "teacher_id": teacher_id,  # Return teacher_id for teachers
-                                "full_name": f"{user.get('first_name')} {user.get('last_name')}",
-                                "message": f"Welcome, {user.get('last_name')}",
-                                "data": user,
-                            }
-                        else:
-                            student_id = user.get("student_id", None)
-                            return {
-                                "status": "found",
-                                "role": role,
-                                "student_id": student_id,  # Return student_id for students
-                                "full_name": f"{user.get('first_name')} {user.get('last_name')}",
-                                "message": f"Welcome, {user.get('last_name')}",
-                                "data": user,
-                            }
-                    return {"status": "not_found", "message": "Incorrect email or password."}
-            return {"status": "not_found", "message": "Incorrect email or password."}
+            timings = {}
+            started = time.perf_counter()
+            role, id_column, user = self.find_user("email", email, LOGIN_FIELDS)
+            timings["lookup"] = round((time.perf_counter() - started) * 1000, 2)
+
+            if not user:
+                return completed_future({"status": "not_found", "message": "Incorrect email or password.", "timings": timings})
+
+            stored_hash = user.pop("password", None) or ""
+            started = time.perf_counter()
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return completed_future({"status": "error", "message": str(e)})
+
+        login = Future()
+
+        def found(current_hash):
+            return {
+                "status": "found",
+                "role": role,
+                id_column: user.get(id_column),  # teacher_id for teachers, student_id for students
+                "full_name": f"{user.get('first_name')} {user.get('last_name')}",
+                "message": f"Welcome, {user.get('last_name')}",
+                "data": user,
+                "credential": self.credential_fingerprint(current_hash),
+                "timings": timings,
+            }
+
+        def on_rehashed(rehash_future):
+            # The saved session is tied to whichever hash is stored once the login finishes
+            timings["rehash"] = round((time.perf_counter() - started) * 1000 - timings["verify"], 2)
+            login.set_result(found(rehash_future.result() or stored_hash))
+
+        def on_verified(verify_future):
+            try:
+                verified = verify_future.result()
+            except Exception as e:
+                login.set_result({"status": "error", "message": str(e)})
+                return
+            timings["verify"] = round((time.perf_counter() - started) * 1000, 2)
+
+            if not verified:
+                login.set_result({"status": "not_found", "message": "Incorrect email or password.", "timings": timings})
+            elif PasswordHasher().needs_rehash(stored_hash):
+                # Only after the hashing cost was raised, once per account
+                self.rehash_password(USER_TABLE_NAMES[role], id_column, user.get(id_column), password)\
+                    .add_done_callback(on_rehashed)
+            else:
+                login.set_result(found(stored_hash))
+
+        self.verify_password_async(password, stored_hash).add_done_callback(on_verified)
+        return login
+
+    def rehash_password(self, table, id_column, user_id, password):
+        # Upgrade a hash stored with an outdated cost; resolves to the new hash, or None if it was not stored
+        def store(hash_future):
+            try:
+                new_hash = hash_future.result()
+                self.client.table(table).update({"password": new_hash}).eq(id_column, user_id).execute()
+                return new_hash
+            except Exception as e:
+                print(f"Error rehashing password for {user_id}: {e}")
+                return None
+
+        return then(self.hash_password_async(password), store)
 
     def insert_student(self, data):
         try:
             response = self.client.table("student_table").insert(data).execute()
+            self.cache.invalidate("student_table", student_id=data.get("student_id"))
             return response
         except Exception as e:
             return {"error": str(e)}
@@ -193,14 +282,23 @@ class UserModel:
     def insert_teacher(self, data):
         try:
             response = self.client.table("teacher_table").insert(data).execute()
+            self.cache.invalidate("teacher_table", teacher_id=data.get("teacher_id"))
             return response
         except Exception as e:
             return {"error": str(e)}
 
     @staticmethod
     def hash_password(password):
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        return PasswordHasher().hash(password).result()
 
     @staticmethod
     def verify_password(password, hashed_password):
-        return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+        return PasswordHasher().verify(password, hashed_password).result()
+
+    @staticmethod
+    def hash_password_async(password):
+        return PasswordHasher().hash(password)
+
+    @staticmethod
+    def verify_password_async(password, hashed_password):
+        return PasswordHasher().verify(password, hashed_password)
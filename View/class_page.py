@@ -1,33 +1,45 @@
-from supabase_manager import get_supabase_client
 from kivy.uix.scrollview import ScrollView
 from kivymd.uix.label import MDLabel
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.card import MDCard
 from kivy.uix.image import Image
+from asset_textures import AssetTextures
 from kivy.uix.floatlayout import FloatLayout
 from kivymd.uix.button import MDRaisedButton, MDFlatButton, MDIconButton
 from kivy.uix.boxlayout import BoxLayout
 from kivymd.uix.dialog import MDDialog
+from kivymd.uix.filemanager import MDFileManager
+from kivymd.toast import toast
+from kivy.clock import Clock
+import os
+import threading
 from Controller.class_controller import ClassController
+from Controller.roster_controller import RosterController
 from session_manager import SessionManager
+from task_dispatcher import TaskDispatcher
+from View.screen_registry import ScreenRegistry
 
 class ClassPage_Teacher(MDScreen):
-    def __init__(self, class_id, student_id, **kwargs):
+    def __init__(self, class_id, student_id=None, **kwargs):
         super().__init__(**kwargs)
 
         self.dialog = None  # Initialize dialog variable
+        self.file_manager = None
+        self.import_cancel = None
+        self.import_task = None
         layout = FloatLayout(size_hint=(1, 1))
 
+        self.class_id = class_id
         self.class_controller = ClassController()
+        self.roster_controller = RosterController()
         self.session = SessionManager()
-        self.client = get_supabase_client()
         # Get the class information from the session
         class_name = self.session.get("class_name", "Class")
         class_code = self.session.get("class_code", "Code")
 
         # Background image setup
         background = Image(
-            source="assets/background.png",
+            texture=AssetTextures().background(),
             allow_stretch=True,
             keep_ratio=False,
             size_hint=(1, 1),
@@ -35,9 +47,6 @@ class ClassPage_Teacher(MDScreen):
         )
         layout.add_widget(background)
 
-        response = self.client.table("student_classes").select("*").eq("class_id", class_id).execute()
-        print(response)
-        total_count = len(response.data)
         # Card layout for content
         card_class = MDCard(
             orientation="vertical",
@@ -84,7 +93,7 @@ class ClassPage_Teacher(MDScreen):
         )
         course_label_layout.add_widget(course_code_label)
 
-        course_class_label = MDRaisedButton(
+        self.course_code_button = MDRaisedButton(
             text=class_code,
             elevation=0,
             size_hint=(0.5, None),
@@ -94,7 +103,7 @@ class ClassPage_Teacher(MDScreen):
             text_color=[1, 1, 1, 1],
             font_name="assets/fonts/Uni Sans Heavy.otf",
         )
-        course_label_layout.add_widget(course_class_label)
+        course_label_layout.add_widget(self.course_code_button)
 
         # Course class layout
         course_label_class_layout = BoxLayout(
@@ -116,7 +125,7 @@ class ClassPage_Teacher(MDScreen):
         )
         course_label_class_layout.add_widget(course_code_class_label)
 
-        course_name_class_label = MDRaisedButton(
+        self.course_name_button = MDRaisedButton(
             text=class_name,
             elevation=0,
             size_hint=(0.5, None),
@@ -126,7 +135,7 @@ class ClassPage_Teacher(MDScreen):
             text_color=[1, 1, 1, 1],
             font_name="assets/fonts/Uni Sans Heavy.otf",
         )
-        course_label_class_layout.add_widget(course_name_class_label)
+        course_label_class_layout.add_widget(self.course_name_button)
 
         # Course count layout
         course_count_layout = BoxLayout(
@@ -148,8 +157,8 @@ class ClassPage_Teacher(MDScreen):
         )
         course_count_layout.add_widget(course_count_class_label)
 
-        student_count_label = MDRaisedButton(
-            text=str(total_count),
+        self.student_count_label = MDRaisedButton(
+            text="...",
             elevation=0,
             size_hint=(0.5, None),
             height="40dp",
@@ -158,7 +167,10 @@ class ClassPage_Teacher(MDScreen):
             text_color=[1, 1, 1, 1],
             font_name="assets/fonts/Uni Sans Heavy.otf",
         )
-        course_count_layout.add_widget(student_count_label)
+        course_count_layout.add_widget(self.student_count_label)
+
+        # The roster count is filled in once the count-only request comes back
+        self.refresh_student_count()
 
         # Button layout
         button_layout = BoxLayout(
@@ -190,6 +202,26 @@ class ClassPage_Teacher(MDScreen):
         )
         button_layout.add_widget(activity_button)
 
+        self.import_button = MDRaisedButton(
+            text="Import Roster",
+            size_hint=(1, None),
+            height="40dp",
+            theme_text_color="Custom",
+            text_color=[1, 1, 1, 1],
+            font_name="assets/fonts/Uni Sans Heavy.otf",
+        )
+        button_layout.add_widget(self.import_button)
+        self.import_button.bind(on_release=self.open_roster_chooser)
+
+        self.import_status_label = MDLabel(
+            text="",
+            halign="center",
+            font_style="Caption",
+            size_hint=(1, None),
+            height="20dp",
+        )
+        card_class.add_widget(self.import_status_label)
+
         delete_button = MDRaisedButton(
             text="Delete Class",
             size_hint=(1, None),
@@ -204,6 +236,100 @@ class ClassPage_Teacher(MDScreen):
 
         self.add_widget(layout)
 
+    def update_student_count(self, total_count):
+        if isinstance(total_count, dict):
+            print(f"Error: {total_count['error']}")
+            return
+        self.student_count_label.text = str(total_count)
+
+    def refresh(self, context):
+        # Reused from the screen registry: the class is the same, but its details may have changed
+        self.course_code_button.text = self.session.get("class_code", "Code")
+        self.course_name_button.text = self.session.get("class_name", "Class")
+        self.refresh_student_count()
+
+    def refresh_student_count(self):
+        TaskDispatcher().submit(
+            self.class_controller.fetch_student_count,
+            self.class_id,
+            on_success=self.update_student_count,
+            owner=self,
+            key=("student_count", self.class_id),
+        )
+
+    def open_roster_chooser(self, instance):
+        if not self.file_manager:
+            self.file_manager = MDFileManager(
+                exit_manager=self.close_roster_chooser,
+                select_path=self.import_roster,
+                ext=[".csv", ".xlsx"],
+            )
+        self.file_manager.show(os.path.expanduser("~"))
+
+    def close_roster_chooser(self, *args):
+        self.file_manager.close()
+
+    def import_roster(self, path):
+        self.close_roster_chooser()
+        if os.path.isdir(path):
+            return
+
+        self.import_cancel = threading.Event()
+        self.import_status_label.text = "Importing roster..."
+        # Not owned by the screen: the import keeps running while the teacher is elsewhere
+        self.import_task = TaskDispatcher().submit(
+            self.roster_controller.import_roster,
+            path,
+            self.class_id,
+            on_progress=lambda report: Clock.schedule_once(lambda dt: self.update_import_progress(report)),
+            cancel_event=self.import_cancel,
+            on_success=self.on_roster_imported,
+            on_loading=self.set_import_loading,
+            key=("roster_import", self.class_id),
+        )
+
+    def set_import_loading(self, loading):
+        self.import_button.disabled = loading
+
+    def update_import_progress(self, report):
+        if self.import_cancel is None or self.import_cancel.is_set():
+            return
+        self.import_status_label.text = (
+            f"Importing roster... {int(report['progress'] * 100)}% "
+            f"({report['enrolled']} enrolled, {report['invalid']} invalid)"
+        )
+
+    def on_roster_imported(self, report):
+        self.import_cancel = None
+        self.import_task = None
+        if report["status"] == "fail":
+            self.import_status_label.text = ""
+            toast(report.get("message", "Roster import failed"))
+            return
+
+        prefix = "Import stopped: " if report["status"] == "cancelled" else ""
+        self.import_status_label.text = (
+            f"{prefix}{report['enrolled']} enrolled, {report['already_enrolled']} already enrolled, "
+            f"{report['duplicates']} duplicates, {report['invalid']} invalid, {report['errors']} errors"
+        )
+        for issue in report["issues"]:
+            print(f"Roster row {issue['row']}: {issue['message']}")
+        self.refresh_student_count()
+
+    def on_leave(self, *args):
+        # A running import carries on and its progress is still shown when the teacher comes back
+        TaskDispatcher().cancel_owner(self)
+
+    def dispose(self):
+        if self.import_cancel is not None:
+            # Stops the import at the next chunk boundary
+            self.import_cancel.set()
+            self.import_cancel = None
+        if self.import_task is not None:
+            TaskDispatcher().cancel(self.import_task)
+            self.import_task = None
+        self.on_leave()
+
     def navigate_back(self, instance):
         self.manager.current = "Home_Teacher"
 
@@ -239,14 +365,11 @@ class ClassPage_Teacher(MDScreen):
         self.delete_class()
 
     def delete_class(self):
-        # Defer the import to avoid circular dependency
-        from View.home_page import Home_Teacher
-
         class_code = self.session.get("class_code", "Code")
         response = self.class_controller.delete_class(class_code)
 
         if response['status'] == 'success':
-            self.manager.add_widget(Home_Teacher(name="Home_Teacher"))
-            self.manager.current = "Home_Teacher"
+            ScreenRegistry().show("Home_Teacher")
+            ScreenRegistry().dispose("ClassPage_Teacher", key=self.class_id)
         else:
             print("Error deleting class:", response['message'])
@@ -1,18 +1,30 @@
 from kivymd.uix.screen import MDScreen
 from kivy.uix.image import Image
+from asset_textures import AssetTextures
 from kivy.uix.floatlayout import FloatLayout
 from kivymd.uix.card import MDCard
 from kivymd.uix.label import MDLabel
 from kivymd.uix.button import MDIconButton
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.scrollview import ScrollView
 from kivy.graphics import Color, Ellipse, Rectangle
 from kivy.uix.widget import Widget
 from kivy.clock import Clock
+from kivymd.toast import toast
 from math import pi
-from supabase_manager import get_supabase_client
+from Controller.activity_controller import ActivityController
 from session_manager import SessionManager
-from datetime import datetime
+from task_dispatcher import TaskDispatcher
+from View.recycle_lists import ActivityList
+from realtime_manager import SUBSCRIBED
+from refresh_scheduler import RefreshScheduler
+
+# Fast polling runs while the realtime channels are not (yet) subscribed
+POLL_INTERVAL = 5
+
+# Hosted realtime does not deliver DELETE events on filtered subscriptions, so removed
+# activities and unchecks from other devices are picked up by this slow poll instead
+RECONCILE_INTERVAL = 60
+RECONCILE_MAX_INTERVAL = 300
 
 class PieChart(Widget):
     def __init__(self, data=None, **kwargs):
@@ -49,81 +61,161 @@ class CourseDetail(MDScreen):
         self.course_code = course_code
         self.course_name = course_name
         self.class_id = class_id
-        self.client = get_supabase_client()
         self.session = SessionManager()
+        self.activity_controller = ActivityController()
         self.student_id = self.session.get('student_id')
         
-        # Fetch activities data from Supabase
-        self.activities_data = self.fetch_activities_data()
+        # Activities are fetched from Supabase in the background once the screen is built
+        self.activities_data = []
+        self.completed_count = 0
         self.progress_data = self.calculate_progress()
+        self.reconcile_stats = {}
+        self.subscriptions = []
+        self.subscription_status = {}
+        self.refresh_job = None
+        self.watching_writes = False
+        # Bursts of updates redraw the chart once, on the next frame
+        self.redraw_chart = Clock.create_trigger(lambda dt: self.update_pie_chart())
         
         self.setup_ui()
-    
-        # Schedule periodic updates
-        Clock.schedule_interval(self.update_data, 5)  # Update every 5 seconds
-    
+
+    def refresh(self, context):
+        # Reused by the screen registry for the same class
+        self.course_code = context.get("course_code", self.course_code)
+        self.course_name = context.get("course_name", self.course_name)
+        self.title_label.text = f"{self.course_name}"
+
+    def dispose(self):
+        self.on_leave()
+
+    def on_enter(self, *args):
+        # The two aggregate counts arrive well before the full activity list
+        TaskDispatcher().submit(
+            self.activity_controller.fetch_class_progress,
+            self.class_id,
+            self.student_id,
+            on_success=self.apply_progress,
+            owner=self,
+            key=("class_progress", self.student_id, self.class_id),
+        )
+        self.update_data(0)
+        self.setup_realtime_subscription()
+        if not self.watching_writes:
+            self.activity_controller.watch_writes(self.on_write_event)
+            self.watching_writes = True
+
+    def on_write_event(self, event):
+        # Called from the outbox thread; only writes that will not be retried need the UI
+        if event["status"] == "dropped" and event["kind"] == "activity_status":
+            Clock.schedule_once(lambda dt: self.on_writes_dropped(event))
+
+    def on_writes_dropped(self, event):
+        toast("Some activity changes could not be saved")
+        # The optimistic state is replaced by what the server actually has
+        self.update_data(0, fresh=True)
+
     def setup_realtime_subscription(self):
-        try:
-            # Subscribe to changes in activity_student table
-            self.client.table('activity_student').on('*', self.handle_realtime_update).subscribe()
-            
-            # Subscribe to changes in activity_table
-            self.client.table('activity_table').on('*', self.handle_realtime_update).subscribe()
-        except Exception as e:
-            print(f"Error setting up real-time subscription: {e}")
+        # Poll until both channels are live, then apply pushed changes and reconcile slowly
+        self.start_polling()
+        self.subscription_status = {}
+        self.subscriptions = self.activity_controller.watch_activities(
+            self.class_id,
+            self.student_id,
+            on_change=lambda change: Clock.schedule_once(lambda dt: self.handle_realtime_update(change)),
+            on_status=lambda table, status: Clock.schedule_once(lambda dt: self.on_subscription_status(table, status)),
+        )
+
+    def on_subscription_status(self, table, status):
+        if not self.subscriptions:
+            return
+        self.subscription_status[table] = status
+        if status != SUBSCRIBED:
+            self.start_polling()
+        elif len(self.subscription_status) == len(self.subscriptions) and \
+                all(value == SUBSCRIBED for value in self.subscription_status.values()):
+            self.start_polling(RECONCILE_INTERVAL, RECONCILE_MAX_INTERVAL)
+            # Pick up anything that changed before the channels were joined
+            self.update_data(0, fresh=True)
 
-    def handle_realtime_update(self, payload):
-        # Schedule the update on the next frame to ensure it runs on the main thread
-        Clock.schedule_once(lambda dt: self.update_data(dt))
+    def handle_realtime_update(self, change):
+        if not self.subscriptions:
+            return
+        activities_data = self.activity_controller.apply_change(self.activities_data, change)
+        if activities_data is None:
+            self.update_data(0, fresh=True)
+        else:
+            self.apply_activities_data(activities_data)
+
+    def start_polling(self, interval=POLL_INTERVAL, max_interval=None):
+        # One job for every CourseDetail instance: registering again replaces the previous poller
+        if self.refresh_job is None or not self.refresh_job.active or self.refresh_job.base_interval != interval:
+            kwargs = {"max_interval": max_interval} if max_interval else {}
+            self.refresh_job = RefreshScheduler().register(
+                "CourseDetail", self.poll_activities, interval=interval, owner=self, **kwargs
+            )
+
+    def stop_polling(self):
+        if self.refresh_job is not None:
+            self.refresh_job.cancel()
+            self.refresh_job = None
+
+    def poll_activities(self, job):
+        # Read past the cache, otherwise every poll would see the previous tick's data
+        TaskDispatcher().submit(
+            self.fetch_activities_data,
+            True,
+            on_success=lambda activities_data: self.on_activities_polled(job, activities_data),
+            on_error=lambda e: job.report(False),
+            owner=self,
+            key=("activities", self.class_id, self.student_id, True),
+        )
+
+    def on_activities_polled(self, job, activities_data):
+        # Unchanged polls let the scheduler back off
+        job.report(activities_data != self.activities_data)
+        self.apply_activities_data(activities_data)
     
-    def update_data(self, dt):
+    def update_data(self, dt, fresh=False):
+        # Fetch data off the main thread; overlapping ticks share one request.
+        # fresh=True bypasses the cache when the server state has to be re-read
+        TaskDispatcher().submit(
+            self.fetch_activities_data,
+            fresh,
+            on_success=self.apply_activities_data,
+            owner=self,
+            key=("activities", self.class_id, self.student_id, fresh),
+        )
+
+    def apply_activities_data(self, activities_data):
         try:
-            # Fetch fresh data
-            self.activities_data = self.fetch_activities_data()
+            if activities_data == self.activities_data:
+                return
+            self.activities_data = activities_data
+            self.completed_count = len([a for a in self.activities_data if a['done']])
             self.progress_data = self.calculate_progress()
             
             # Update UI
             self.update_activities_ui()
-            self.update_pie_chart()
+            self.redraw_chart()
         except Exception as e:
             print(f"Error updating data: {e}")
     
-    def fetch_activities_data(self):
-        try:
-            activities_response = self.client.table('activity_table')\
-                .select('*')\
-                .eq('class_id', self.class_id)\
-                .execute()
-            
-            activities = activities_response.data
-            
-            completed_response = self.client.table('activity_student')\
-                .select('activity_id')\
-                .eq('student_id', self.student_id)\
-                .execute()
-            
-            completed_activities = {item['activity_id'] for item in completed_response.data}
-            
-            activities_with_status = []
-            for activity in activities:
-                activities_with_status.append({
-                    'activity_id': activity['activity_id'],
-                    'name': activity['activity_name'],
-                    'done': activity['activity_id'] in completed_activities,
-                    'created_at': activity['created_at']
-                })
-            
-            return sorted(activities_with_status, key=lambda x: x['created_at'])
-        except Exception as e:
-            print(f"Error fetching activities: {e}")
-            return []
+    def fetch_activities_data(self, fresh=False):
+        return self.activity_controller.fetch_activities_with_status(self.class_id, self.student_id, fresh)
     
+    def apply_progress(self, progress):
+        if self.activities_data or not progress["total"]:
+            return
+        self.progress_data = {"Complete": progress["percent"], "Incomplete": 100 - progress["percent"]}
+        self.update_pie_chart()
+
     def calculate_progress(self):
         if not self.activities_data:
             return {"Complete": 0, "Incomplete": 100}
         
+        # completed_count is kept up to date by apply_activities_data and toggle_activity
         total = len(self.activities_data)
-        completed = len([a for a in self.activities_data if a['done']])
+        completed = self.completed_count
         
         complete_percentage = round((completed / total) * 100) if total > 0 else 0
         incomplete_percentage = 100 - complete_percentage
@@ -147,63 +239,47 @@ class CourseDetail(MDScreen):
                     label_widget.text = f"Incomplete: {self.progress_data['Incomplete']}%"
 
     def update_activities_ui(self):
-        if hasattr(self, 'activities_layout'):
-            self.activities_layout.clear_widgets()
-            
-            for activity in self.activities_data:
-                activity_item = BoxLayout(
-                    orientation='horizontal',
-                    size_hint_y=None,
-                    height="40dp",
-                    spacing="10dp"
-                )
-                
-                # Use a different icon to show status (not interactive)
-                status_icon = MDIconButton(
-                    icon="checkbox-marked-circle" if activity["done"] else "checkbox-blank-circle-outline",
-                    theme_text_color="Custom",
-                    text_color=(0, 0.6, 0, 1),
-                    size_hint=(None, None),
-                    size=("24dp", "24dp"),
-                    disabled=True  # Make it non-interactive
-                )
-                
-                activity_label = MDLabel(
-                    text=activity["name"],
-                    theme_text_color="Custom",
-                    text_color=(0, 0, 0, 1)
-                )
-                
-                activity_item.add_widget(status_icon)
-                activity_item.add_widget(activity_label)
-                self.activities_layout.add_widget(activity_item)
+        # Rows are keyed by activity_id and only rendered for the visible part of the list;
+        # an unchanged refresh leaves the RecycleView data (and its widgets) alone
+        if not hasattr(self, 'activities_list'):
+            return
+
+        previous = {activity['activity_id']: activity for activity in self.activities_list.data}
+        current = {activity['activity_id'] for activity in self.activities_data}
+        added = len(current - set(previous))
+        removed = len(set(previous) - current)
+        changed = sum(
+            1 for activity in self.activities_data
+            if activity['activity_id'] in previous and previous[activity['activity_id']] != activity
+        )
+        reordered = [a['activity_id'] for a in self.activities_list.data] != [a['activity_id'] for a in self.activities_data]
+
+        if added or removed or changed or reordered:
+            self.activities_list.data = [dict(activity) for activity in self.activities_data]
+
+        self.reconcile_stats = {
+            "added": added,
+            "removed": removed,
+            "changed": changed,
+            "views": self.activities_list.get_view_count(),
+        }
     
-    def toggle_activity(self, activity_id, checkbox):
-        try:
-            if checkbox.icon == "checkbox-blank-circle-outline":
-                # Mark as complete
-                self.client.table('activity_student').insert({
-                    'activity_id': activity_id,
-                    'student_id': self.student_id,
-                    'checked_at': datetime.now().isoformat()
-                }).execute()
-                checkbox.icon = "checkbox-marked-circle"
-            else:
-                # Mark as incomplete
-                self.client.table('activity_student')\
-                    .delete()\
-                    .eq('activity_id', activity_id)\
-                    .eq('student_id', self.student_id)\
-                    .execute()
-                checkbox.icon = "checkbox-blank-circle-outline"
-            
-            # Update progress
-            self.activities_data = self.fetch_activities_data()
-            self.progress_data = self.calculate_progress()
-            self.update_pie_chart()
-            
-        except Exception as e:
-            print(f"Error toggling activity: {e}")
+    def toggle_activity(self, activity_id):
+        activity = next((a for a in self.activities_data if a['activity_id'] == activity_id), None)
+        if activity is None:
+            return
+        done = not activity['done']
+        # The outbox keeps the write on the device and sends it with the rest of the burst,
+        # so the row and the chart flip immediately, online or not, without a refetch
+        self.activity_controller.queue_activity_status(activity_id, self.student_id, done)
+
+        index = self.activities_data.index(activity)
+        updated = dict(activity, done=done)
+        self.activities_data = self.activities_data[:index] + [updated] + self.activities_data[index + 1:]
+        self.activities_list.data[index] = dict(updated)
+        self.completed_count += 1 if done else -1
+        self.progress_data = self.calculate_progress()
+        self.redraw_chart()
     
     def update_pie_chart(self):
         if hasattr(self, 'pie_chart'):
@@ -220,19 +296,9 @@ class CourseDetail(MDScreen):
     
     def setup_ui(self):
         layout = FloatLayout(size_hint=(1, 1))
-             # When setting up activities, store the layout reference
-        self.activities_layout = BoxLayout(
-            orientation='vertical',
-            size_hint_y=None,
-            spacing="10dp"
-        )
-        self.activities_layout.bind(minimum_height=self.activities_layout.setter('height'))
-        
-        # Initial population of activities
-        self.update_activities_ui()   
         # Background
         background = Image(
-            source="assets/background.png",
+            texture=AssetTextures().background(),
             allow_stretch=True,
             keep_ratio=False,
             size_hint=(1, 1),
@@ -265,7 +331,7 @@ class CourseDetail(MDScreen):
             on_release=self.go_back
         )
         
-        title = MDLabel(
+        self.title_label = MDLabel(
             text=f"{self.course_name}",
             theme_text_color="Custom",
             text_color=(0, 0.6, 0, 1),
@@ -274,7 +340,7 @@ class CourseDetail(MDScreen):
         )
         
         header.add_widget(back_button)
-        header.add_widget(title)
+        header.add_widget(self.title_label)
         header_card.add_widget(header)
         
         # Graph Card
@@ -365,49 +431,14 @@ class CourseDetail(MDScreen):
             height="30dp"
         )
         
-        scroll_view = ScrollView(size_hint=(1, 1))
-        activities_layout = BoxLayout(
-            orientation='vertical',
-            size_hint_y=None,
-            spacing="10dp"
-        )
-        activities_layout.bind(minimum_height=activities_layout.setter('height'))
+        # Only the visible activity rows exist as widgets
+        self.activities_list = ActivityList(on_toggle=self.toggle_activity, size_hint=(1, 1))
         
         # Add activities from Supabase data
-        for activity in self.activities_data:
-            activity_item = BoxLayout(
-                orientation='horizontal',
-                size_hint_y=None,
-                height="40dp",
-                spacing="10dp"
-            )
-            
-            checkbox = MDIconButton(
-                icon="checkbox-marked-circle" if activity["done"] else "checkbox-blank-circle-outline",
-                theme_text_color="Custom",
-                text_color=(0, 0.6, 0, 1),
-                size_hint=(None, None),
-                size=("24dp", "24dp")
-            )
-            
-            checkbox.bind(
-                on_release=lambda instance, aid=activity['activity_id'], 
-                cb=checkbox: self.toggle_activity(aid, cb)
-            )
-            
-            activity_label = MDLabel(
-                text=activity["name"],
-                theme_text_color="Custom",
-                text_color=(0, 0, 0, 1)
-            )
-            
-            activity_item.add_widget(checkbox)
-            activity_item.add_widget(activity_label)
-            activities_layout.add_widget(activity_item)
+        self.update_activities_ui()
         
-        scroll_view.add_widget(activities_layout)
         activities_card.add_widget(activities_label)
-        activities_card.add_widget(scroll_view)
+        activities_card.add_widget(self.activities_list)
         
         # Add all widgets to main layout
         layout.add_widget(header_card)
@@ -415,17 +446,17 @@ class CourseDetail(MDScreen):
         layout.add_widget(activities_card)
         
         self.add_widget(layout)
-    def on_leave(self):
+    def on_leave(self, *args):
         # Clean up subscriptions when leaving the screen
-        try:
-            self.client.remove_subscription('activity_student')
-            self.client.remove_subscription('activity_table')
-        except Exception as e:
-            print(f"Error removing subscriptions: {e}")
+        self.activity_controller.unwatch_activities(self.subscriptions)
+        self.subscriptions = []
         
-        # Stop the update interval
-        Clock.unschedule(self.update_data)
+        # Stop the fallback polling and drop any pending background results
+        self.stop_polling()
+        TaskDispatcher().cancel_owner(self)
+        if self.watching_writes:
+            self.activity_controller.unwatch_writes(self.on_write_event)
+            self.watching_writes = False
 
     def go_back(self, instance):
-        self.session.clear()
         self.manager.current = "Home_Student"
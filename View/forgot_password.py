@@ -5,22 +5,29 @@ from kivymd.uix.card import MDCard
 from kivymd.uix.textfield import MDTextField
 from kivymd.uix.button import MDRaisedButton
 from kivy.uix.image import Image
+from asset_textures import AssetTextures
 from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.boxlayout import BoxLayout
 from Controller.user_controller import UserController
+from task_dispatcher import TaskDispatcher
+from mail_dispatcher import SENT, FAILED, RETRYING
+from kivy.clock import Clock
+from View.screen_registry import ScreenRegistry
 
 
 class Forgot_Password(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
+        self.user_controller = UserController()
+
         layout = FloatLayout(size_hint=(1, 1))
 
         background = Image(
-            source="assets/background.png",
+            texture=AssetTextures().background(crop=0.5),
             allow_stretch=True,
             keep_ratio=False,
-            size_hint=(2, 1),
+            size_hint=(1, 1),
             pos_hint={"x": 0, "y": 0},
         )
         layout.add_widget(background)
@@ -74,8 +81,7 @@ class Forgot_Password(MDScreen):
         button_layout.add_widget(login_button)
 
         def switch_to_forgot_password2_screen(instance):
-            self.manager.add_widget(Forgot_Password2(name="forgot_password2"))
-            self.manager.current = "forgot_password2"
+            ScreenRegistry().show("forgot_password2")
 
         submit_button = MDRaisedButton(
             text="Send Code",
@@ -96,13 +102,30 @@ class Forgot_Password(MDScreen):
         def request_reset_code(instance):
             email = email_field.text
             self.email = email
-            result = UserController().request_password_reset(email)
+            TaskDispatcher().submit(
+                self.user_controller.request_password_reset,
+                email,
+                on_status=lambda job: Clock.schedule_once(lambda dt: on_mail_status(job.status, job.error)),
+                on_success=on_reset_requested,
+                owner=self,
+                key=("password_reset", email),
+            )
+
+        def on_reset_requested(result):
             if result["status"] == "success":
                 self.reset_code = result["code"]
                 print("Code sent to email.")
             else:
                 print(result["message"])
 
+        def on_mail_status(status, error):
+            if status == SENT:
+                toast("Code sent to email.")
+            elif status == RETRYING:
+                print(f"Retrying reset code email: {error}")
+            elif status == FAILED:
+                toast("Could not send the code, please try again.")
+
         submit_button.bind(on_release=request_reset_code)
 
 
@@ -113,10 +136,10 @@ class Forgot_Password2(MDScreen):
         layout = FloatLayout(size_hint=(1, 1))
 
         background = Image(
-            source="assets/background.png",
+            texture=AssetTextures().background(crop=0.5),
             allow_stretch=True,
             keep_ratio=False,
-            size_hint=(2, 1),
+            size_hint=(1, 1),
             pos_hint={"x": 0, "y": 0},
         )
         layout.add_widget(background)
@@ -160,8 +183,7 @@ class Forgot_Password2(MDScreen):
             entered_code = self.code_field.text
             forgot_password_screen = self.manager.get_screen('forgot_password')
             if entered_code == forgot_password_screen.reset_code:
-                self.manager.add_widget(Forgot_Password3(name="forgot_password3"))
-                self.manager.current = "forgot_password3"
+                ScreenRegistry().show("forgot_password3")
             else:
                 toast("Invalid Code")
 
@@ -186,13 +208,15 @@ class Forgot_Password3(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
+        self.user_controller = UserController()
+
         layout = FloatLayout(size_hint=(1, 1))
 
         background = Image(
-            source="assets/background.png",
+            texture=AssetTextures().background(crop=0.5),
             allow_stretch=True,
             keep_ratio=False,
-            size_hint=(2, 1),
+            size_hint=(1, 1),
             pos_hint={"x": 0, "y": 0},
         )
         layout.add_widget(background)
@@ -262,7 +286,16 @@ class Forgot_Password3(MDScreen):
 
         email = self.manager.get_screen('forgot_password').email
 
-        result = UserController().model.change_password(email, new_password)
+        TaskDispatcher().submit(
+            self.user_controller.model.change_password,
+            email,
+            new_password,
+            on_success=self.on_password_changed,
+            owner=self,
+            key=("change_password", email),
+        )
+
+    def on_password_changed(self, result):
         print(result)
 
         # if isinstance(result, dict) and result.get("status") == "success":
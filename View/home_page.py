@@ -1,44 +1,79 @@
-from supabase_manager import get_supabase_client
 from kivymd.uix.label import MDLabel
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.card import MDCard
 from kivy.uix.image import Image
+from asset_textures import AssetTextures
 from kivy.uix.floatlayout import FloatLayout
 from kivymd.uix.button import MDIconButton, MDFlatButton
-from kivy.uix.gridlayout import GridLayout
-from kivy.uix.scrollview import ScrollView
 from kivymd.uix.dialog import MDDialog
 from kivymd.uix.textfield import MDTextField
 from kivy.uix.popup import Popup
-from kivy.core.image import Image as CoreImage
-from io import BytesIO
-import qrcode
-from View.class_page import ClassPage_Teacher
 from Controller.class_controller import ClassController
+from Controller.user_controller import UserController
+from Controller.activity_controller import ActivityController
 from session_manager import SessionManager
+from View.screen_registry import ScreenRegistry
+from task_dispatcher import TaskDispatcher
 from kivy.uix.boxlayout import BoxLayout
 from kivymd.toast import toast
 from kivy.graphics import Color, RoundedRectangle
-from View.course_detail import CourseDetail
+from kivy.clock import Clock
+from View.recycle_lists import CourseGrid
+from qr_cache import QRCodeCache
+
+
+class QRCodePopupContent(BoxLayout):
+    def __init__(self, student_id, texture, **kwargs):
+        super().__init__(**kwargs)
+        self.orientation = "vertical"
+        self.padding = 20  # Padding around the content
+        self.spacing = 15  # Spacing between title and QR code
+        with self.canvas.before:
+            Color(1, 1, 1, 1)  # White background color
+            self.rect = RoundedRectangle(radius=[20], pos=self.pos, size=self.size)
+        self.bind(pos=self.update_rect, size=self.update_rect)
+
+        # Add a title to the popup
+        title = MDLabel(
+            text=f"[b]Student ID: {student_id}[/b]",
+            markup=True,
+            font_name="Roboto-Bold",
+            font_size="20sp",
+            halign="center",
+            size_hint=(1, None),
+            height=50,
+        )
+        self.add_widget(title)
+
+        # Add the QR code image
+        qr_image_widget = Image(texture=texture, allow_stretch=True, size_hint=(1, 1))
+        self.add_widget(qr_image_widget)
+
+    def update_rect(self, *args):
+        self.rect.pos = self.pos
+        self.rect.size = self.size
+
 
 class Home_Student(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.client = get_supabase_client()
-        # Grid layout for course tiles (2 columns)
-        self.grid_layout = GridLayout(
+        # Course tiles (3 columns); only the visible tiles exist as widgets
+        self.course_grid = CourseGrid(
+            on_open=lambda item: self.open_course_detail(item["class_code"], item["class_name"], item["class_id"]),
             cols=3,
             spacing=15,
-            size_hint_y=None,
-            padding=[10, 10, 10, 10]
+            padding=[10, 10, 10, 10],
+            size_hint=(1, 1),
         )
-        self.grid_layout.bind(minimum_height=self.grid_layout.setter('height'))
 
         layout = FloatLayout(size_hint=(1, 1))
 
         self.class_controller = ClassController()
+        self.user_controller = UserController()
+        self.activity_controller = ActivityController()
 
         self.session = SessionManager()
+        self.watching_writes = False
 
         self.student_id = self.session.get('student_id')
 
@@ -47,7 +82,7 @@ class Home_Student(MDScreen):
             print("Warning: full_name not set in session, defaulting to 'Guest'")
 
         background = Image(
-            source="assets/background.png",
+            texture=AssetTextures().background(),
             allow_stretch=True,
             keep_ratio=False,
             size_hint=(1, 1),
@@ -74,24 +109,20 @@ class Home_Student(MDScreen):
         )
         card_user_profile.add_widget(profile_icon)
 
-        response = self.client.table('student_table').select('first_name, last_name').eq('student_id', self.student_id).execute()
-        name = response.data
-        f_name = ""
-        l_name = ""
-        for n in name:
-            f_name = n['first_name']
-            l_name = n['last_name']
-        print(f_name + l_name)
-
-        card_user_profile.add_widget(
-            MDLabel(
-                text=f_name + " " + l_name,
-                halign="center",
-                theme_text_color="Primary",
-                font_style="H6",
-                bold=True,
-            )
+        # Show the name from the session right away and refresh it from the profile in the background
+        self.name_label = MDLabel(
+            text="" if self.full_name == "Guest" else self.full_name,
+            halign="center",
+            theme_text_color="Primary",
+            font_style="H6",
+            bold=True,
         )
+        card_user_profile.add_widget(self.name_label)
+        self.display_student_name()
+
+        # Render the QR code in the background so it opens instantly
+        if self.student_id:
+            QRCodeCache().prepare(self.student_id)
 
         icons_layout = BoxLayout(
             orientation="horizontal",
@@ -106,65 +137,12 @@ class Home_Student(MDScreen):
             if student_id == "Unknown ID":
                 print("Warning: student_id not set in session, defaulting to 'Unknown ID'")
 
-            qr = qrcode.QRCode(version=1, box_size=10, border=5)
-            qr.add_data(student_id)
-            qr.make(fit=True)
-            img = qr.make_image(fill="black", back_color="white")
-
-            # Save the QR code to a BytesIO object
-            buffer = BytesIO()
-            img.save(buffer, format="PNG")
-            buffer.seek(0)
-
-            # Create a CoreImage from the QR code
-            qr_image = CoreImage(buffer, ext="png")
-
-            # Custom widget with a title, QR code, and styled layout
-            class CustomPopupContent(BoxLayout):
-                def __init__(self, **kwargs):
-                    super().__init__(**kwargs)
-                    self.orientation = "vertical"
-                    self.padding = 20  # Padding around the content
-                    self.spacing = 15  # Spacing between title and QR code
-                    with self.canvas.before:
-                        Color(1, 1, 1, 1)  # White background color
-                        self.rect = RoundedRectangle(radius=[20], pos=self.pos, size=self.size)
-                    self.bind(pos=self.update_rect, size=self.update_rect)
-
-                    # Add a title to the popup
-                    title = MDLabel(
-                        text=f"[b]Student ID: {student_id}[/b]",
-                        markup=True,
-                        font_name="Roboto-Bold",
-                        font_size="20sp",
-                        halign="center",
-                        size_hint=(1, None),
-                        height=50,
-                    )
-                    self.add_widget(title)
-
-                    # Add the QR code image
-                    qr_image_widget = Image(texture=qr_image.texture, allow_stretch=True, size_hint=(1, 1))
-                    self.add_widget(qr_image_widget)
-
-                def update_rect(self, *args):
-                    self.rect.pos = self.pos
-                    self.rect.size = self.size
-
-            # Instantiate the custom content
-            popup_content = CustomPopupContent()
-
-            # Create the popup
-            qr_popup = Popup(
-                title="",
-                content=popup_content,
-                size_hint=(None, None),
-                size=(400, 400),
-                background_color=[0, 0, 0, 0],  # Transparent popup background
-                separator_color=[0, 0, 0, 0],  # Remove separator
-                auto_dismiss=True
-            )
-            qr_popup.open()
+            # Normally rendered right after login; otherwise it opens as soon as it is ready
+            texture = QRCodeCache().get_texture(student_id)
+            if texture is not None:
+                self.show_qr_code(student_id, texture)
+            else:
+                QRCodeCache().prepare(student_id, on_ready=lambda texture: self.show_qr_code(student_id, texture))
 
         qr_code_icon = MDIconButton(
             icon="qrcode",
@@ -200,8 +178,11 @@ class Home_Student(MDScreen):
 
         def confirm_logout(dialog):
             self.session.clear()
-            self.manager.current = "Login"
+            # Login may not exist yet when the app was resumed from a saved session
+            ScreenRegistry().show("Login")
             dialog.dismiss()
+            # Everything built for this user goes away with the session
+            ScreenRegistry().reset()
 
         def open_add_class_dialog(instance):
             if not self.dialog:
@@ -282,12 +263,7 @@ class Home_Student(MDScreen):
         )
         card_user_class.add_widget(title_label)
 
-        # ScrollView for courses
-        scroll_view = ScrollView(size_hint=(1, 1))
-        
-        
-        scroll_view.add_widget(self.grid_layout)
-        card_user_class.add_widget(scroll_view)
+        card_user_class.add_widget(self.course_grid)
 
         self.dialog = None
 
@@ -298,128 +274,159 @@ class Home_Student(MDScreen):
 
     def add_class(self, class_code):
         if class_code.strip():
-            # Call the controller to get the class details from Supabase
-            class_data = self.class_controller.fetch_class_by_code(class_code)
-
-            if class_data:
-                id = class_data['id']
-                class_name = class_data['class_name']
-
-                # Get student_id from the session
-                student_id = self.session.get("student_id", "Unknown ID")
-                if student_id == "Unknown ID":
-                    print("Warning: student_id not set in session, defaulting to 'Unknown ID'")
-
-                # Call the controller to add the student to the class in Supabase
-                self.class_controller.enroll_student_in_class(student_id, id)
-
-                # Create and add the button for the new class
-                new_button_layout = FloatLayout(size_hint=(None, None), size=(125, 100))
-
-                new_icon = MDIconButton(
-                    icon="notebook",
-                    theme_text_color="Custom",
-                    text_color=(0, 0.6, 0, 1),
-                    icon_size="50dp",
-                    pos_hint={"center_x": 0.5, "top": 1},
-                )
-                new_label = MDLabel(
-                    text=class_name,  # Use the class_name fetched from Supabase
-                    halign="center",
-                    size_hint=(1, None),
-                    height="20dp",
-                    bold=True,
-                    font_style="Caption",
-                    pos_hint={"center_x": 0.5, "y": 0},
-                )
-
-                # Add the icon and label to the layout
-                new_button_layout.add_widget(new_icon)
-                new_button_layout.add_widget(new_label)
+            # Get student_id from the session
+            student_id = self.session.get("student_id", "Unknown ID")
+            if student_id == "Unknown ID":
+                print("Warning: student_id not set in session, defaulting to 'Unknown ID'")
 
-                # Add the new layout to the grid
-                self.grid_layout.add_widget(new_button_layout)
-            else:
-                print(f"No class found for class_code: {class_code}")
+            TaskDispatcher().submit(
+                self.enroll_by_code,
+                class_code,
+                student_id,
+                on_success=lambda class_data: self.on_class_added(class_code, class_data),
+                owner=self,
+                key=("add_class", class_code, student_id),
+            )
 
             self.dialog.dismiss()
-    def fetch_classes_for_student(self, student_id):
-        response = self.client.table("student_classes").select("*").eq("student_id", student_id).execute()
-        class_codes = []
-        for res in response.data:
-            class_codes.append(res['class_id'])
-        return class_codes
+
+    def enroll_by_code(self, class_code, student_id):
+        # Runs on the task dispatcher: look the class up and queue the enrollment in the outbox
+        return self.class_controller.queue_enrollment(class_code, student_id)
+
+    def on_class_added(self, class_code, class_data):
+        if "error" in class_data:
+            print(f"No class found for class_code: {class_code}")
+            return
+
+        if any(item["class_id"] == class_data['id'] for item in self.course_grid.data):
+            return
+
+        # Add a tile for the new class
+        self.course_grid.data.append({
+            "class_name": class_data['class_name'],
+            "class_code": class_code,
+            "class_id": class_data['id'],
+        })
+        self.display_class_progress()
+
+    def refresh(self, context):
+        # Reused by the screen registry, possibly for a different student
+        self.student_id = self.session.get('student_id')
+        self.full_name = self.session.get("full_name", "Guest")
+        self.name_label.text = "" if self.full_name == "Guest" else self.full_name
+        self.display_student_name()
+        self.display_student_classes(self.student_id)
+        if self.student_id:
+            QRCodeCache().prepare(self.student_id)
+        if not self.watching_writes:
+            self.class_controller.watch_writes(self.on_write_event)
+            self.watching_writes = True
+
+    def dispose(self):
+        TaskDispatcher().cancel_owner(self)
+        if self.watching_writes:
+            self.class_controller.unwatch_writes(self.on_write_event)
+            self.watching_writes = False
+
+    def on_write_event(self, event):
+        # Called from the outbox thread; an enrollment that will not be retried leaves a tile behind
+        if event["status"] == "dropped" and event["kind"] == "enrollment":
+            if any(payload["student_id"] == self.student_id for payload in event["payloads"]):
+                Clock.schedule_once(lambda dt: self.on_enrollments_dropped(event))
+
+    def on_enrollments_dropped(self, event):
+        names = ", ".join(payload["class_name"] for payload in event["payloads"] if payload["student_id"] == self.student_id)
+        toast(f"Could not add {names}")
+        # The queued tile is replaced by the classes the server actually has
+        self.display_student_classes(self.student_id)
+
+    def show_qr_code(self, student_id, texture):
+        qr_popup = Popup(
+            title="",
+            content=QRCodePopupContent(student_id, texture),
+            size_hint=(None, None),
+            size=(400, 400),
+            background_color=[0, 0, 0, 0],  # Transparent popup background
+            separator_color=[0, 0, 0, 0],  # Remove separator
+            auto_dismiss=True
+        )
+        qr_popup.open()
+
+    def display_student_name(self):
+        # Show the name from the session right away and refresh it from the profile in the background
+        TaskDispatcher().submit(
+            self.user_controller.fetch_student_name,
+            self.student_id,
+            on_refresh=lambda full_name: Clock.schedule_once(lambda dt: self.update_student_name(full_name)),
+            on_success=self.update_student_name,
+            owner=self,
+            key=("student_name", self.student_id),
+        )
+
+    def update_student_name(self, full_name):
+        if full_name:
+            self.name_label.text = full_name
 
     def display_student_classes(self, student_id):
-        # Fetch class codes for the student
-        class_codes = self.fetch_classes_for_student(student_id)
-        
-        for code in class_codes:
-            # Query to fetch the class name by class_code
-            response = self.client.table("classes").select("id, class_name,class_code").eq("id", code).execute()
-            class_name = ""
-            class_code = 0
-            class_id = 0
-            for res in response.data:
-                class_name = res['class_name']
-                class_code = res['class_code'] 
-                class_id = res['id']
-            
-            # Create and configure UI widgets
-            new_button_layout = FloatLayout(size_hint=(None, None), size=(125, 100))
-
-            # Create a button that will handle the touch events
-            new_icon = MDIconButton(
-                icon="notebook",
-                theme_text_color="Custom",
-                text_color=(0, 0.6, 0, 1),
-                icon_size="50dp",
-                pos_hint={"center_x": 0.5, "top": 1},
-            )
-            
-            # Bind the button press event
-            new_icon.bind(
-                on_release=lambda instance, code=code, name=class_name: self.open_course_detail(class_code, class_name, class_id)
-            )
+        # Cached classes render right away; a refreshed copy re-renders the grid when it arrives
+        TaskDispatcher().submit(
+            self.class_controller.fetch_classes_for_student,
+            student_id,
+            on_refresh=lambda classes: Clock.schedule_once(lambda dt: self.show_student_classes(classes)),
+            on_success=self.show_student_classes,
+            owner=self,
+            key=("student_classes", student_id),
+        )
 
-            new_label = MDLabel(
-                text=class_name,
-                halign="center",
-                size_hint=(1, None),
-                height="20dp",
-                bold=True,
-                font_style="Caption",
-                pos_hint={"center_x": 0.5, "y": 0},
-            )
+    def show_student_classes(self, classes):
+        if "error" in classes:
+            print(f"Error: {classes['error']}")
+            return
 
-            new_button_layout.add_widget(new_icon)
-            new_button_layout.add_widget(new_label)
+        # Replacing the data rebinds the pooled tiles; no widgets are built per class
+        self.course_grid.data = [
+            {
+                "class_name": class_info["class_name"],
+                "class_code": class_info["class_code"],
+                "class_id": class_info["id"],
+            }
+            for class_info in classes
+        ]
+        self.display_class_progress()
+
+    def display_class_progress(self):
+        # One aggregate request covers every enrolled course
+        class_ids = [item["class_id"] for item in self.course_grid.data]
+        if not class_ids:
+            return
+        TaskDispatcher().submit(
+            self.activity_controller.fetch_progress_for_classes,
+            class_ids,
+            self.student_id,
+            on_refresh=lambda progress: Clock.schedule_once(lambda dt: self.show_class_progress(progress)),
+            on_success=self.show_class_progress,
+            owner=self,
+            key=("class_progress", self.student_id, tuple(class_ids)),
+        )
 
-            # Add the new layout to the grid
-            self.grid_layout.add_widget(new_button_layout)
+    def show_class_progress(self, progress):
+        if not progress:
+            return
+        self.course_grid.data = [
+            dict(item, progress=progress.get(item["class_id"], item.get("progress")))
+            for item in self.course_grid.data
+        ]
 
     def open_course_detail(self, course_code, course_name, class_id):
         print(f"Opening course detail: {course_name} ({course_code})")
-        # First, check if the screen already exists
-        existing_screen = self.manager.get_screen("CourseDetail") if self.manager.has_screen("CourseDetail") else None
-        
-        if existing_screen:
-            # Update existing screen with new details
-            existing_screen.course_code = course_code
-            existing_screen.course_name = course_name
-        else:
-            # Create new screen
-            course_screen = CourseDetail(
-                name="CourseDetail",
-                course_code=course_code,
-                course_name=course_name,
-                class_id = class_id
-            )
-            self.manager.add_widget(course_screen)
-        
-        # Switch to the course detail screen
-        self.manager.transition.direction = 'left'  # Optional: adds a transition effect
-        self.manager.current = "CourseDetail"
+        # One cached screen per class; revisiting a course reuses it
+        ScreenRegistry().show(
+            "CourseDetail",
+            key=class_id,
+            context={"course_code": course_code, "course_name": course_name, "class_id": class_id},
+            direction="left",
+        )
 
 class Home_Teacher(MDScreen):
     def __init__(self, **kwargs):
@@ -442,7 +449,7 @@ class Home_Teacher(MDScreen):
         layout = FloatLayout(size_hint=(1, 1))
 
         background = Image(
-            source="assets/background.png",
+            texture=AssetTextures().background(),
             allow_stretch=True,
             keep_ratio=False,
             size_hint=(1, 1),
@@ -470,15 +477,14 @@ class Home_Teacher(MDScreen):
         )
         card_user_profile.add_widget(profile_icon)
 
-        card_user_profile.add_widget(
-            MDLabel(
-                text=full_name,
-                halign="center",
-                theme_text_color="Primary",
-                font_style="H6",
-                bold=True,
-            )
+        self.name_label = MDLabel(
+            text="" if full_name == "Guest" else full_name,
+            halign="center",
+            theme_text_color="Primary",
+            font_style="H6",
+            bold=True,
         )
+        card_user_profile.add_widget(self.name_label)
 
         # Logout button
         def logout(instance):
@@ -506,8 +512,9 @@ class Home_Teacher(MDScreen):
 
         def confirm_logout(dialog):
             self.session.clear()
-            self.manager.current = "Login"
+            ScreenRegistry().show("Login")
             dialog.dismiss()
+            ScreenRegistry().reset()
 
         def open_add_class_dialog(instance):
             if not self.dialog:
@@ -579,19 +586,15 @@ class Home_Teacher(MDScreen):
             padding=[10, 10, 10, 10],
         )
 
-        # ScrollView for the grid of classes
-        scroll_view = ScrollView(size_hint=(1, 1))
-
-        # GridLayout to hold the class icons
-        self.grid_layout = GridLayout(
+        # Recycling grid of class tiles
+        self.course_grid = CourseGrid(
+            on_open=lambda item: self.go_to_class_page(item["class_name"], item["class_code"], item.get("class_id")),
             cols=3,
             spacing=5,
-            size_hint_y=None,
+            padding=[0, 0, 0, 0],
+            size_hint=(1, 1),
         )
-        self.grid_layout.bind(minimum_height=self.grid_layout.setter("height"))
-
-        scroll_view.add_widget(self.grid_layout)
-        card_user_class.add_widget(scroll_view)
+        card_user_class.add_widget(self.course_grid)
 
         self.dialog = None
 
@@ -605,86 +608,66 @@ class Home_Teacher(MDScreen):
                     print("Error: Teacher ID is not available.")
                     return
 
-                result = self.class_controller.create_class(class_name, teacher_id)
+                TaskDispatcher().submit(
+                    self.class_controller.create_class,
+                    class_name,
+                    teacher_id,
+                    on_success=lambda result: on_class_created(class_name, result),
+                    owner=self,
+                    key=("create_class", class_name),
+                )
 
-                if "error" in result:
-                    toast(f"{result['error']}")
-                else:
-                    new_button_layout = FloatLayout(size_hint=(None, None), size=(130, 100))
+            self.dialog.dismiss()
 
-                    new_icon = MDIconButton(
-                        icon="notebook",
-                        theme_text_color="Custom",
-                        text_color=(0, 0.6, 0, 1),
-                        icon_size="50dp",
-                        pos_hint={"center_x": 0.5, "top": 1},
-                    )
-                    new_label = MDLabel(
-                        text=class_name,
-                        halign="center",
-                        size_hint=(1, None),
-                        height="20dp",
-                        bold=True,
-                        font_style="Caption",
-                        pos_hint={"center_x": 0.5, "y": 0},
-                    )
-
-                    new_button_layout.add_widget(new_icon)
-                    new_button_layout.add_widget(new_label)
-
-                    new_icon.bind(
-                        on_release=lambda instance, name=class_name: self.go_to_class_page(name, "Unknown Code"))
-
-                    self.grid_layout.add_widget(new_button_layout)
+        def on_class_created(class_name, result):
+            if isinstance(result, dict) and "error" in result:
+                toast(f"{result['error']}")
+                return
 
-            self.dialog.dismiss()
+            # create_class returns the new class code; the reload below fills in its id
+            self.course_grid.data.append({"class_name": class_name, "class_code": result, "class_id": None})
+            self.display_teacher_classes(self.session.get("teacher_id"))
 
         layout.add_widget(card_user_class)
 
         # Add the main layout to the screen
         self.add_widget(layout)
 
-    def go_to_class_page(self, class_name, result):
+    def refresh(self, context):
+        # Reused by the screen registry, possibly for a different teacher
+        full_name = self.session.get("full_name", "Guest")
+        self.name_label.text = "" if full_name == "Guest" else full_name
+        self.display_teacher_classes(self.session.get("teacher_id"))
+
+    def go_to_class_page(self, class_name, result, class_id=None):
+        if class_id is None:
+            toast("Class is still being created")
+            return
         # Store class information in the session
         self.session.set("class_name", class_name)
         self.session.set("class_code", result)
-        self.manager.add_widget(ClassPage_Teacher(name="ClassPage_Teacher", class_id=60, student_id=2205879))
-        self.manager.current = "ClassPage_Teacher"
+        ScreenRegistry().show("ClassPage_Teacher", key=class_id, context={"class_id": class_id})
 
     def display_teacher_classes(self, teacher_id):
-        classes = self.class_controller.fetch_classes_for_teacher(teacher_id)
+        # Cached classes render right away; a refreshed copy re-renders the grid when it arrives
+        TaskDispatcher().submit(
+            self.class_controller.fetch_classes_for_teacher,
+            teacher_id,
+            on_refresh=lambda classes: Clock.schedule_once(lambda dt: self.show_teacher_classes(classes)),
+            on_success=self.show_teacher_classes,
+            owner=self,
+            key=("teacher_classes", teacher_id),
+        )
+
+    def show_teacher_classes(self, classes):
         if "error" in classes:
             print(f"Error: {classes['error']}")
         else:
-            for class_info in classes:
-                class_name = class_info.get("class_name", "")
-                class_code = class_info.get("class_code", "")
-
-                new_button_layout = FloatLayout(size_hint=(None, None), size=(125, 100))
-
-                new_icon = MDIconButton(
-                    icon="notebook",
-                    theme_text_color="Custom",
-                    text_color=(0, 0.6, 0, 1),
-                    icon_size="50dp",
-                    pos_hint={"center_x": 0.5, "top": 1},
-                )
-                new_label = MDLabel(
-                    text=class_name,
-                    halign="center",
-                    size_hint=(1, None),
-                    height="20dp",
-                    bold=True,
-                    font_style="Caption",
-                    pos_hint={"center_x": 0.5, "y": 0},
-                )
-
-                new_button_layout.add_widget(new_icon)
-                new_button_layout.add_widget(new_label)
-
-
-                new_icon.bind(
-                    on_release=lambda instance, name=class_name, code=class_code: self.go_to_class_page(name, code)
-                )
-
-                self.grid_layout.add_widget(new_button_layout)
+            self.course_grid.data = [
+                {
+                    "class_name": class_info.get("class_name", ""),
+                    "class_code": class_info.get("class_code", ""),
+                    "class_id": class_info.get("id"),
+                }
+                for class_info in classes
+            ]
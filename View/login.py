@@ -1,16 +1,16 @@
+import time
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.card import MDCard
 from kivymd.toast import toast
 from kivymd.uix.textfield import MDTextField
 from kivymd.uix.button import MDRaisedButton, MDFlatButton, MDTextButton
 from kivy.uix.image import Image
+from asset_textures import AssetTextures
 from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.boxlayout import BoxLayout
-from Controller.user_controller import UserController
 from session_manager import SessionManager
-from View.home_page import Home_Student, Home_Teacher
-from View.forgot_password import Forgot_Password
-from View.register import Registration_Type
+from task_dispatcher import TaskDispatcher
+from View.screen_registry import ScreenRegistry
 
 class Login(MDScreen):
     def __init__(self, **kwargs):
@@ -18,16 +18,17 @@ class Login(MDScreen):
 
         self.session = SessionManager()
 
-        self.UserController = UserController()
+        # Created on the first login attempt, off the main thread, so startup does not load it
+        self.UserController = None
 
         layout = FloatLayout(size_hint=(1, 1))
 
         # Background Image
         background = Image(
-            source="assets/background.png",
+            texture=AssetTextures().background(crop=0.5),
             allow_stretch=True,
             keep_ratio=False,
-            size_hint=(2, 1),
+            size_hint=(1, 1),
             pos_hint={"x": 0, "y": 0},
         )
         layout.add_widget(background)
@@ -46,8 +47,9 @@ class Login(MDScreen):
         spacer = BoxLayout(size_hint_y=None, height="20dp")
         card.add_widget(spacer)
 
+        # Pre-scaled to the size it is shown at instead of decoding the full-resolution logo
         logo = Image(
-            source="assets/logo.png",
+            texture=AssetTextures().logo(width_fraction=0.6, height="150dp"),
             size_hint=(0.6, None),
             height="150dp",
             pos_hint={"center_x": 0.5, "center_y": 0.2},
@@ -82,8 +84,7 @@ class Login(MDScreen):
         card.add_widget(text_fields_box)
 
         def switch_to_forgot_password_screen(instance):
-            self.manager.add_widget(Forgot_Password(name="forgot_password"))
-            self.manager.current = "forgot_password"
+            ScreenRegistry().show("forgot_password")
 
         forgot_password_button = MDTextButton(
             text="Forgot Password?",
@@ -104,35 +105,52 @@ class Login(MDScreen):
             if not email or not password:
                 toast("Please enter both email and password.")
             else:
-                result = self.UserController.login_account(email, password)
-                if result["status"] == "success":
-                    toast(result.get("message"))
-                    full_name = result.get("full_name")
-                    role = result.get("role")
-                    student_id = result.get("student_id")
-                    teacher_id = result.get("teacher_id")  # Get teacher_id for teachers
-
-                    if full_name:
-                        self.session.set("full_name", full_name)
-                    if role:
-                        self.session.set("role", role)
-                    if student_id:
-                        self.session.set("student_id", student_id)
-                    if teacher_id:
-                        self.session.set("teacher_id", teacher_id)  # Store teacher_id in session
-
-                    if role == "student":
-                        self.manager.add_widget(Home_Student(name="Home_Student"))
-                        self.manager.current = "Home_Student"
-                    else:
-                        self.manager.add_widget(Home_Teacher(name="Home_Teacher"))
-                        self.manager.current = "Home_Teacher"
-
-                    # Clear the fields after successful login
-                    self.email_field.text = ""
-                    self.password_field.text = ""
-                else:
-                    toast(result.get("message"))
+                # Lookup and password verification run off the main thread
+                TaskDispatcher().submit(
+                    self.login_account,
+                    email,
+                    password,
+                    on_success=lambda result: on_login_result(result, email),
+                    on_loading=lambda loading: setattr(login_button, "disabled", loading),
+                    owner=self,
+                    key=("login", email),
+                )
+
+        def on_login_result(result, email):
+            if result["status"] == "success":
+                started = time.perf_counter()
+                toast(result.get("message"))
+                full_name = result.get("full_name")
+                role = result.get("role")
+                student_id = result.get("student_id")
+                teacher_id = result.get("teacher_id")  # Get teacher_id for teachers
+
+                if full_name:
+                    self.session.set("full_name", full_name)
+                if role:
+                    self.session.set("role", role)
+                if student_id:
+                    self.session.set("student_id", student_id)
+                if teacher_id:
+                    self.session.set("teacher_id", teacher_id)  # Store teacher_id in session
+
+                self.session.set("email", email)
+                self.session.set("credential", result.get("credential"))
+                # The next launch opens the home screen directly from this snapshot
+                self.session.persist()
+
+                timings = dict(result.get("timings", {}))
+                timings["session"] = round((time.perf_counter() - started) * 1000, 2)
+                self.session.set("login_timings", timings)
+
+                # Built on first login; later logins reuse the screen and refresh it from the session
+                ScreenRegistry().show("Home_Student" if role == "student" else "Home_Teacher")
+
+                # Clear the fields after successful login
+                self.email_field.text = ""
+                self.password_field.text = ""
+            else:
+                toast(result.get("message"))
 
         login_button = MDRaisedButton(
             text="Login",
@@ -146,8 +164,7 @@ class Login(MDScreen):
         card.add_widget(login_button)
 
         def switch_to_register_screen(instance):
-            self.manager.add_widget(Registration_Type(name="Registration_Type"))
-            self.manager.current = "Registration_Type"
+            ScreenRegistry().show("Registration_Type")
 
         register_button = MDFlatButton(
             text="Register",
@@ -162,3 +179,9 @@ class Login(MDScreen):
         layout.add_widget(card)
 
         self.add_widget(layout)
+
+    def login_account(self, email, password):
+        if self.UserController is None:
+            from Controller.user_controller import UserController
+            self.UserController = UserController()
+        return self.UserController.login_account_async(email, password)
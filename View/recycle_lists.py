@@ -0,0 +1,129 @@
+from kivy.metrics import dp
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.floatlayout import FloatLayout
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recyclegridlayout import RecycleGridLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivymd.uix.button import MDIconButton
+from kivymd.uix.label import MDLabel
+
+# Only the rows that fit on screen (plus a small margin) exist as widgets;
+# scrolling rebinds these view holders to other entries of RecycleView.data.
+
+
+class CourseTile(RecycleDataViewBehavior, FloatLayout):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.rv = None
+        self.index = None
+
+        self.icon = MDIconButton(
+            icon="notebook",
+            theme_text_color="Custom",
+            text_color=(0, 0.6, 0, 1),
+            icon_size="50dp",
+            pos_hint={"center_x": 0.5, "top": 1},
+        )
+        self.label = MDLabel(
+            text="",
+            halign="center",
+            size_hint=(1, None),
+            height="20dp",
+            bold=True,
+            font_style="Caption",
+            pos_hint={"center_x": 0.5, "y": 0},
+        )
+        self.progress_label = MDLabel(
+            text="",
+            halign="center",
+            size_hint=(1, None),
+            height="16dp",
+            font_style="Overline",
+            theme_text_color="Custom",
+            text_color=(0, 0.6, 0, 1),
+            pos_hint={"center_x": 0.5, "y": 0.2},
+        )
+        self.add_widget(self.icon)
+        self.add_widget(self.label)
+        self.add_widget(self.progress_label)
+        self.icon.bind(on_release=lambda instance: self.rv.open_item(self.index))
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.rv = rv
+        self.index = index
+        self.label.text = data.get("class_name", "")
+        progress = data.get("progress")
+        self.progress_label.text = f"{progress['percent']}% done" if progress and progress["total"] else ""
+
+
+class CourseGrid(RecycleView):
+    def __init__(self, on_open, cols=3, spacing=15, padding=(10, 10, 10, 10), **kwargs):
+        # on_open(item) receives the data dict of the tapped tile
+        super().__init__(**kwargs)
+        self.on_open = on_open
+        self.viewclass = CourseTile
+        layout = RecycleGridLayout(
+            cols=cols,
+            spacing=spacing,
+            padding=padding,
+            default_size=(125, 100),
+            default_size_hint=(None, None),
+            size_hint_y=None,
+        )
+        layout.bind(minimum_height=layout.setter("height"))
+        self.add_widget(layout)
+
+    def open_item(self, index):
+        if index is not None and index < len(self.data):
+            self.on_open(self.data[index])
+
+
+class ActivityRow(RecycleDataViewBehavior, BoxLayout):
+    def __init__(self, **kwargs):
+        super().__init__(orientation="horizontal", spacing="10dp", **kwargs)
+        self.rv = None
+        self.activity_id = None
+
+        self.checkbox = MDIconButton(
+            icon="checkbox-blank-circle-outline",
+            theme_text_color="Custom",
+            text_color=(0, 0.6, 0, 1),
+            size_hint=(None, None),
+            size=("24dp", "24dp"),
+        )
+        self.label = MDLabel(
+            text="",
+            theme_text_color="Custom",
+            text_color=(0, 0, 0, 1),
+        )
+        self.add_widget(self.checkbox)
+        self.add_widget(self.label)
+        # Bound once; the activity it acts on follows whatever entry the row currently shows
+        self.checkbox.bind(on_release=lambda instance: self.rv.on_toggle(self.activity_id))
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.rv = rv
+        self.activity_id = data["activity_id"]
+        self.checkbox.icon = "checkbox-marked-circle" if data["done"] else "checkbox-blank-circle-outline"
+        self.label.text = data["name"]
+
+
+class ActivityList(RecycleView):
+    def __init__(self, on_toggle, **kwargs):
+        # on_toggle(activity_id) is called when a row's checkbox is tapped
+        super().__init__(**kwargs)
+        self.on_toggle = on_toggle
+        self.viewclass = ActivityRow
+        layout = RecycleBoxLayout(
+            orientation="vertical",
+            spacing=dp(10),
+            default_size=(None, dp(40)),
+            default_size_hint=(1, None),
+            size_hint_y=None,
+        )
+        layout.bind(minimum_height=layout.setter("height"))
+        self.add_widget(layout)
+
+    def get_view_count(self):
+        return len(self.layout_manager.children) if self.layout_manager else 0
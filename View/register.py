@@ -3,17 +3,32 @@ from kivymd.toast import toast
 from kivymd.uix.textfield import MDTextField
 from kivymd.uix.button import MDRaisedButton, MDRectangleFlatButton, MDIconButton
 from kivy.uix.image import Image
+from asset_textures import AssetTextures
 from kivy.uix.floatlayout import FloatLayout
 from kivymd.uix.menu import MDDropdownMenu
 from kivy.uix.boxlayout import BoxLayout
 from Controller.user_controller import UserController
+from task_dispatcher import TaskDispatcher
 from kivymd.uix.screen import MDScreen
+from View.screen_registry import ScreenRegistry
 
 class BaseRegistrationScreen(MDScreen):
-    def __init__(self, **kwargs):
+    # "student" or "teacher" on the screens that check school records
+    record_kind = None
+
+    def __init__(self, registration_data=None, **kwargs):
         super().__init__(**kwargs)
         self.user_controller = UserController()
-        self.registration_data = {}
+        self.registration_data = registration_data or {}
+
+    def refresh(self, context):
+        # Called by the screen registry when a cached screen is shown again
+        if "registration_data" in context:
+            self.registration_data = context["registration_data"]
+
+    def on_enter(self, *args):
+        if self.record_kind:
+            self.user_controller.prepare_registration(self.record_kind)
 
     def reset_fields(self):
         # Reset all MDTextField widgets on the screen
@@ -32,10 +47,10 @@ class Registration_Type(BaseRegistrationScreen):
         layout = FloatLayout(size_hint=(1, 1))
 
         background = Image(
-            source="assets/background.png",
+            texture=AssetTextures().background(crop=0.5),
             allow_stretch=True,
             keep_ratio=False,
-            size_hint=(2, 1),
+            size_hint=(1, 1),
             pos_hint={"x": 0, "y": 0},
         )
         layout.add_widget(background)
@@ -104,27 +119,27 @@ class Registration_Type(BaseRegistrationScreen):
 
     def go_to_next_screen(self, instance):
         if self.user_type.text == "Student":
-            self.manager.add_widget(Register_Student1(name="Register_Student1"))
-            self.manager.current = "Register_Student1"
+            ScreenRegistry().show("Register_Student1")
             self.user_type.text="Select User Type"
         elif self.user_type.text == "Teacher":
-            self.manager.add_widget(Register_Teacher1(name="Register_Teacher1"))
-            self.manager.current = "Register_Teacher1"
+            ScreenRegistry().show("Register_Teacher1")
             self.user_type.text="Select User Type"
         else:
             toast("Please select a user type!")
 
 class Register_Student1(BaseRegistrationScreen):
+    record_kind = "student"
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
         layout = FloatLayout(size_hint=(1, 1))
 
         background = Image(
-            source="assets/background.png",
+            texture=AssetTextures().background(crop=0.5),
             allow_stretch=True,
             keep_ratio=False,
-            size_hint=(2, 1),
+            size_hint=(1, 1),
             pos_hint={"x": 0, "y": 0},
         )
         layout.add_widget(background)
@@ -183,17 +198,22 @@ class Register_Student1(BaseRegistrationScreen):
             if not (first_name and last_name and student_id):
                 toast("Please fill up the missing fields")
             else:
-                result = self.user_controller.validate_user_id(student_id)
-                if result.get("status") == "fail":
-                    toast(result.get("message"))
-                else:
-                    result = self.user_controller.validate_student(first_name, last_name, student_id)
-                    if result['status'] == 'fail' :
-                        toast(result.get("message"))
-                    else:
-                        self.manager.add_widget(Register_Student2(name="Register_Student2"))
-                        self.manager.current = "Register_Student2"
-                        self.manager.get_screen("Register_Student2").registration_data = self.registration_data
+                TaskDispatcher().submit(
+                    self.user_controller.validate_student_registration,
+                    first_name,
+                    last_name,
+                    student_id,
+                    on_success=on_validated,
+                    on_loading=lambda loading: setattr(register_button, "disabled", loading),
+                    owner=self,
+                    key=("validate_student", student_id),
+                )
+
+        def on_validated(result):
+            if result.get("status") == "fail":
+                toast(result.get("message"))
+            else:
+                ScreenRegistry().show("Register_Student2", context={"registration_data": self.registration_data})
 
         register_button = MDRaisedButton(
             text=">",
@@ -231,10 +251,10 @@ class Register_Student2(BaseRegistrationScreen):
         layout = FloatLayout(size_hint=(1, 1))
 
         background = Image(
-            source="assets/background.png",
+            texture=AssetTextures().background(crop=0.5),
             allow_stretch=True,
             keep_ratio=False,
-            size_hint=(2, 1),
+            size_hint=(1, 1),
             pos_hint={"x": 0, "y": 0},
         )
         layout.add_widget(background)
@@ -296,20 +316,27 @@ class Register_Student2(BaseRegistrationScreen):
             elif password != confirm_password:
                 toast("Passwords do not match")
             else:
-                result = self.user_controller.validate_email(email)
-                if result.get("status") == "fail":
-                    toast(result.get("message"))
-                else:
-                    self.user_controller.register_student(
-                        student_id=self.registration_data.get("student_id"),
-                        first_name=self.registration_data.get("first_name"),
-                        last_name=self.registration_data.get("last_name"),
-                        email=email,
-                        password=password,
-                        password_code=0000,
-                    )
-                    toast("Registration Successful")
-                    self.manager.current = "Login"
+                # Validation, hashing and the insert all run off the main thread
+                TaskDispatcher().submit(
+                    self.user_controller.register_student_async,
+                    student_id=self.registration_data.get("student_id"),
+                    first_name=self.registration_data.get("first_name"),
+                    last_name=self.registration_data.get("last_name"),
+                    email=email,
+                    password=password,
+                    password_code=0000,
+                    on_success=on_registered,
+                    on_loading=lambda loading: setattr(register_button, "disabled", loading),
+                    owner=self,
+                    key=("register", email),
+                )
+
+        def on_registered(result):
+            if result.get("status") == "success":
+                toast("Registration Successful")
+                self.manager.current = "Login"
+            else:
+                toast(result.get("message"))
 
         register_button = MDRaisedButton(
             text="Register",
@@ -344,16 +371,18 @@ class Register_Student2(BaseRegistrationScreen):
 
 
 class Register_Teacher1(BaseRegistrationScreen):
+    record_kind = "teacher"
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
         layout = FloatLayout(size_hint=(1, 1))
 
         background = Image(
-            source="assets/background.png",
+            texture=AssetTextures().background(crop=0.5),
             allow_stretch=True,
             keep_ratio=False,
-            size_hint=(2, 1),
+            size_hint=(1, 1),
             pos_hint={"x": 0, "y": 0},
         )
         layout.add_widget(background)
@@ -412,16 +441,22 @@ class Register_Teacher1(BaseRegistrationScreen):
             if not (first_name and last_name and teacher_id):
                 toast("Please fill up the missing fields")
             else:
-                result=self.user_controller.validate_user_id(teacher_id)
-                if result.get("status") == "fail":
-                    toast(result.get("message"))
-                else:
-                    result = self.user_controller.validate_teacher(last_name, teacher_id, first_name)
-                    if result.get("status") == "fail":
-                        toast(result.get("message"))
-                    else:
-                        self.manager.current = "Register_Teacher2"
-                        self.manager.get_screen("Register_Teacher2").registration_data = self.registration_data
+                TaskDispatcher().submit(
+                    self.user_controller.validate_teacher_registration,
+                    first_name,
+                    last_name,
+                    teacher_id,
+                    on_success=on_validated,
+                    on_loading=lambda loading: setattr(register_button, "disabled", loading),
+                    owner=self,
+                    key=("validate_teacher", teacher_id),
+                )
+
+        def on_validated(result):
+            if result.get("status") == "fail":
+                toast(result.get("message"))
+            else:
+                ScreenRegistry().show("Register_Teacher2", context={"registration_data": self.registration_data})
 
         register_button = MDRaisedButton(
             text=">",
@@ -459,10 +494,10 @@ class Register_Teacher2(BaseRegistrationScreen):
         layout = FloatLayout(size_hint=(1, 1))
 
         background = Image(
-            source="assets/background.png",
+            texture=AssetTextures().background(crop=0.5),
             allow_stretch=True,
             keep_ratio=False,
-            size_hint=(2, 1),
+            size_hint=(1, 1),
             pos_hint={"x": 0, "y": 0},
         )
         layout.add_widget(background)
@@ -524,20 +559,27 @@ class Register_Teacher2(BaseRegistrationScreen):
             elif password != confirm_password:
                 toast("Passwords do not match")
             else:
-                result = self.user_controller.validate_email(email)
-                if result.get("status") == "fail":
-                    toast(result.get("message"))
-                else:
-                    self.user_controller.register_teacher(
-                        teacher_id=self.registration_data.get("teacher_id"),
-                        first_name=self.registration_data.get("first_name"),
-                        last_name=self.registration_data.get("last_name"),
-                        email=email,
-                        password=password,
-                        password_code=0000,
-                    )
-                    toast("Registration Successful")
-                    self.manager.current = "Login"
+                # Validation, hashing and the insert all run off the main thread
+                TaskDispatcher().submit(
+                    self.user_controller.register_teacher_async,
+                    teacher_id=self.registration_data.get("teacher_id"),
+                    first_name=self.registration_data.get("first_name"),
+                    last_name=self.registration_data.get("last_name"),
+                    email=email,
+                    password=password,
+                    password_code=0000,
+                    on_success=on_registered,
+                    on_loading=lambda loading: setattr(register_button, "disabled", loading),
+                    owner=self,
+                    key=("register", email),
+                )
+
+        def on_registered(result):
+            if result.get("status") == "success":
+                toast("Registration Successful")
+                self.manager.current = "Login"
+            else:
+                toast(result.get("message"))
 
         register_button = MDRaisedButton(
             text="Register",
@@ -0,0 +1,107 @@
+import importlib
+import os
+from collections import OrderedDict
+from kivy.clock import Clock
+
+# Parameterized screens (one per class, course, ...) kept alive at once
+SCREEN_CACHE_SIZE = int(os.environ.get("SCREEN_CACHE_SIZE", "4"))
+
+# Screen name -> (module, class); modules are only imported when the screen is first shown
+SCREENS = {
+    "Login": ("View.login", "Login"),
+    "Home_Student": ("View.home_page", "Home_Student"),
+    "Home_Teacher": ("View.home_page", "Home_Teacher"),
+    "CourseDetail": ("View.course_detail", "CourseDetail"),
+    "ClassPage_Teacher": ("View.class_page", "ClassPage_Teacher"),
+    "Registration_Type": ("View.register", "Registration_Type"),
+    "Register_Student1": ("View.register", "Register_Student1"),
+    "Register_Student2": ("View.register", "Register_Student2"),
+    "Register_Teacher1": ("View.register", "Register_Teacher1"),
+    "Register_Teacher2": ("View.register", "Register_Teacher2"),
+    "forgot_password": ("View.forgot_password", "Forgot_Password"),
+    "forgot_password2": ("View.forgot_password", "Forgot_Password2"),
+    "forgot_password3": ("View.forgot_password", "Forgot_Password3"),
+}
+
+
+class ScreenRegistry:
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(ScreenRegistry, cls).__new__(cls, *args, **kwargs)
+            cls._instance.manager = None
+            cls._instance.parameterized = OrderedDict()
+            cls._instance.stats = {"built": 0, "reused": 0, "evicted": 0, "disposed": 0}
+        return cls._instance
+
+    def attach(self, manager):
+        self.manager = manager
+
+    def show(self, name, key=None, context=None, direction=None):
+        # Builds the screen with Screen(name=..., **context) on first use; afterwards the same
+        # instance is reused and gets screen.refresh(context) instead.
+        # Screens with a key (e.g. a class_id) are cached per key, up to SCREEN_CACHE_SIZE of them.
+        screen = self.get(name, key, context)
+        if direction:
+            self.manager.transition.direction = direction
+        self.manager.current = screen.name
+        return screen
+
+    def get(self, name, key=None, context=None):
+        context = context or {}
+        screen_name = name if key is None else f"{name}_{key}"
+        if self.manager.has_screen(screen_name):
+            screen = self.manager.get_screen(screen_name)
+            self.stats["reused"] += 1
+            if hasattr(screen, "refresh"):
+                screen.refresh(context)
+        else:
+            module_name, class_name = SCREENS[name]
+            screen_class = getattr(importlib.import_module(module_name), class_name)
+            screen = screen_class(name=screen_name, **context)
+            self.manager.add_widget(screen)
+            self.stats["built"] += 1
+
+        if key is not None:
+            self.parameterized[screen_name] = screen
+            self.parameterized.move_to_end(screen_name)
+            self._evict()
+        return screen
+
+    def dispose(self, name, key=None):
+        if self.manager.transition.is_active:
+            # Same as reset(): a screen that is still animating out cannot be removed yet
+            Clock.schedule_once(lambda dt: self.dispose(name, key), self.manager.transition.duration)
+            return
+        screen_name = name if key is None else f"{name}_{key}"
+        if self.manager.has_screen(screen_name):
+            self._remove(self.manager.get_screen(screen_name))
+
+    def reset(self, keep=("Login",)):
+        # Drop every screen built for the signed-in user, e.g. on logout
+        if self.manager.transition.is_active:
+            # The screen being left cannot be removed while it is still animating out
+            Clock.schedule_once(lambda dt: self.reset(keep), self.manager.transition.duration)
+            return
+        for screen in list(self.manager.screens):
+            if screen.name not in keep and screen.name != self.manager.current:
+                self._remove(screen)
+
+    def get_stats(self):
+        return dict(self.stats, screens=len(self.manager.screens) if self.manager else 0, parameterized=len(self.parameterized))
+
+    def _evict(self):
+        for screen_name in list(self.parameterized):
+            if len(self.parameterized) <= SCREEN_CACHE_SIZE:
+                return
+            if screen_name != self.manager.current:
+                self._remove(self.parameterized[screen_name])
+                self.stats["evicted"] += 1
+
+    def _remove(self, screen):
+        self.parameterized.pop(screen.name, None)
+        if hasattr(screen, "dispose"):
+            screen.dispose()
+        self.manager.remove_widget(screen)
+        self.stats["disposed"] += 1
@@ -0,0 +1,92 @@
+import hashlib
+import os
+from kivy.core.image import Image as CoreImage
+from kivy.core.window import Window
+from kivy.graphics import ClearBuffers, ClearColor, Fbo, Rectangle
+from kivy.metrics import dp
+from local_storage import get_data_path
+
+BACKGROUND = "assets/background.png"
+LOGO = "assets/logo.png"
+
+# Pre-scaled variants are written here so later launches never decode the full-size originals
+ASSET_CACHE_DIR = "assets"
+
+
+class AssetTextures:
+    # Every screen shares one texture per (asset, size); textures are created on the Kivy main thread only.
+    # Variants are sized from Window.size when a screen is built and are not re-keyed on resize or
+    # rotation: the Image widgets simply stretch the variant they have (the app runs at a fixed size).
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(AssetTextures, cls).__new__(cls, *args, **kwargs)
+            cls._instance.textures = {}
+            # Fbos whose textures are in use because the scaled file could not be saved
+            cls._instance.fbos = {}
+            cls._instance.stats = {"hits": 0, "disk_loads": 0, "scaled": 0}
+        return cls._instance
+
+    def background(self, crop=1.0):
+        # The window-sized background; crop keeps only the left part of the image (0.5 = left half)
+        return self.get(BACKGROUND, Window.size, keep_ratio=False, crop=crop)
+
+    def logo(self, width_fraction=0.6, height="150dp"):
+        return self.get(LOGO, (Window.width * width_fraction, dp(height)))
+
+    def get(self, source, size, keep_ratio=True, crop=1.0):
+        # size is in window pixels, so the variant already matches the screen's density
+        width, height = max(1, int(size[0])), max(1, int(size[1]))
+        key = (source, width, height, keep_ratio, crop)
+        texture = self.textures.get(key)
+        if texture is not None:
+            self.stats["hits"] += 1
+            return texture
+
+        mtime = os.path.getmtime(source)
+        digest = hashlib.sha1(repr((source, mtime) + key[1:]).encode("utf-8")).hexdigest()[:16]
+        path = os.path.join(self._cache_dir(), f"{digest}.png")
+        if os.path.exists(path):
+            texture = CoreImage(path).texture
+            self.stats["disk_loads"] += 1
+        else:
+            texture = self._scale(source, path, width, height, keep_ratio, crop, key)
+            self.stats["scaled"] += 1
+        self.textures[key] = texture
+        return texture
+
+    def get_stats(self):
+        return dict(self.stats, textures=len(self.textures))
+
+    @staticmethod
+    def _cache_dir():
+        path = get_data_path(ASSET_CACHE_DIR)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _scale(self, source, path, width, height, keep_ratio, crop, key):
+        # The original is decoded once, drawn into a texture of the target size on the GPU
+        # and saved; nocache keeps the full-size texture out of Kivy's own image cache
+        original = CoreImage(source, nocache=True).texture
+        region = original.get_region(0, 0, max(1, int(original.width * crop)), original.height)
+        if keep_ratio:
+            scale = min(width / region.width, height / region.height, 1)
+            width, height = max(1, int(region.width * scale)), max(1, int(region.height * scale))
+
+        fbo = Fbo(size=(width, height))
+        with fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+            Rectangle(texture=region, size=(width, height))
+        fbo.draw()
+
+        try:
+            CoreImage(fbo.texture).save(path, flipped=False)
+        except Exception as e:
+            # Without the file, the Fbo is kept alive so it can redraw its texture after a GL context loss
+            print(f"Could not cache scaled {source}: {e}")
+            self.fbos[key] = fbo
+            return fbo.texture
+        # A texture loaded from a file is reloaded by Kivy when the GL context is recreated (e.g. Android resume)
+        return CoreImage(path).texture
@@ -0,0 +1,425 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Offline stand-in for the hosted Supabase project. Enable it with
+# SUPABASE_BACKEND=local; SUPABASE_LOCAL_DB picks the SQLite file (":memory:" by default),
+# SUPABASE_LOCAL_LATENCY_MS injects a fixed per-request delay and
+# SUPABASE_LOCAL_FIXTURE points to a JSON file of {table: [rows]} loaded on start.
+# Writes are announced to in-process listeners in the same shape as realtime change events.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS teacher_table (
+    teacher_id TEXT PRIMARY KEY,
+    first_name TEXT,
+    last_name TEXT,
+    email TEXT UNIQUE,
+    password TEXT,
+    password_code TEXT
+);
+CREATE TABLE IF NOT EXISTS student_table (
+    student_id TEXT PRIMARY KEY,
+    first_name TEXT,
+    last_name TEXT,
+    email TEXT UNIQUE,
+    password TEXT,
+    password_code TEXT
+);
+CREATE TABLE IF NOT EXISTS teacher_records (
+    teacher_id TEXT PRIMARY KEY,
+    first_name TEXT,
+    last_name TEXT,
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE TABLE IF NOT EXISTS student_records (
+    student_id TEXT PRIMARY KEY,
+    first_name TEXT,
+    last_name TEXT,
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE TABLE IF NOT EXISTS classes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    class_name TEXT UNIQUE,
+    class_code TEXT UNIQUE,
+    teacher_id TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS student_classes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id TEXT,
+    class_id INTEGER,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS activity_table (
+    activity_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    class_id INTEGER,
+    activity_name TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS activity_student (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    activity_id INTEGER,
+    student_id TEXT,
+    checked_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_classes_teacher_id ON classes (teacher_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_student_classes_enrollment ON student_classes (student_id, class_id);
+CREATE INDEX IF NOT EXISTS idx_student_classes_class_id ON student_classes (class_id);
+CREATE INDEX IF NOT EXISTS idx_activity_table_class_id ON activity_table (class_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_activity_student_completion ON activity_student (activity_id, student_id);
+CREATE INDEX IF NOT EXISTS idx_activity_student_student_id ON activity_student (student_id);
+CREATE INDEX IF NOT EXISTS idx_activity_student_activity_id ON activity_student (activity_id);
+CREATE INDEX IF NOT EXISTS idx_student_records_names ON student_records (student_id, last_name, first_name);
+CREATE INDEX IF NOT EXISTS idx_teacher_records_names ON teacher_records (teacher_id, last_name, first_name);
+"""
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class LocalAPIError(Exception):
+    def __init__(self, message, code=None, details=None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+        self.details = details
+
+
+class LocalResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+    def __repr__(self):
+        return f"LocalResponse(data={self.data!r}, count={self.count!r})"
+
+
+def _identifier(name):
+    if not _IDENTIFIER.match(name):
+        raise LocalAPIError(f"Unsupported identifier: {name}", code="PGRST100")
+    return f'"{name}"'
+
+
+class LocalQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = _identifier(table)
+        self.table_name = table
+        self.operation = "select"
+        self.columns = "*"
+        self.payload = None
+        self.count = None
+        self.head = False
+        self.filters = []
+        self.order_by = []
+        self.limit_count = None
+
+    def select(self, *columns, count=None, head=False):
+        self.operation = "select"
+        self.count = count
+        self.head = head
+        names = [c.strip() for c in ",".join(columns or ("*",)).split(",") if c.strip()]
+        if not names or "*" in names:
+            self.columns = "*"
+        else:
+            self.columns = ", ".join(_identifier(name) for name in names)
+        return self
+
+    def insert(self, json, **kwargs):
+        self.operation = "insert"
+        self.payload = json if isinstance(json, list) else [json]
+        return self
+
+    def upsert(self, json, on_conflict="", ignore_duplicates=False, **kwargs):
+        self.operation = "upsert"
+        self.payload = json if isinstance(json, list) else [json]
+        self.on_conflict = [column.strip() for column in on_conflict.split(",") if column.strip()]
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, json, **kwargs):
+        self.operation = "update"
+        self.payload = json
+        return self
+
+    def delete(self, **kwargs):
+        self.operation = "delete"
+        return self
+
+    def _filter(self, column, operator, value):
+        self.filters.append((f"{_identifier(column)} {operator} ?", [value]))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "=", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "!=", value)
+
+    def gt(self, column, value):
+        return self._filter(column, ">", value)
+
+    def gte(self, column, value):
+        return self._filter(column, ">=", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "<", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "<=", value)
+
+    def in_(self, column, values):
+        values = list(values)
+        if not values:
+            self.filters.append(("0", []))
+        else:
+            placeholders = ", ".join("?" for _ in values)
+            self.filters.append((f"{_identifier(column)} IN ({placeholders})", values))
+        return self
+
+    def order(self, column, desc=False):
+        self.order_by.append(f"{_identifier(column)} {'DESC' if desc else 'ASC'}")
+        return self
+
+    def limit(self, size):
+        self.limit_count = int(size)
+        return self
+
+    def _where(self):
+        if not self.filters:
+            return "", []
+        params = []
+        for _, values in self.filters:
+            params.extend(values)
+        return " WHERE " + " AND ".join(sql for sql, _ in self.filters), params
+
+    def execute(self):
+        self.client.simulate_latency()
+        with self.client.lock:
+            try:
+                if self.operation == "select":
+                    return self._execute_select()
+                if self.operation == "insert":
+                    response = self._execute_insert()
+                elif self.operation == "upsert":
+                    response = self._execute_upsert()
+                elif self.operation == "update":
+                    response = self._execute_update()
+                else:
+                    response = self._execute_delete()
+            except sqlite3.IntegrityError as e:
+                raise _integrity_error(e)
+            except sqlite3.Error as e:
+                raise LocalAPIError(str(e), code="42000")
+        # Listeners run outside the lock so they may query the client themselves
+        self.client.notify(self.table_name, self.operation, response.data)
+        return response
+
+    def _execute_select(self):
+        where, params = self._where()
+        count = None
+        if self.count:
+            count = self.client.connection.execute(
+                f"SELECT COUNT(*) FROM {self.table}{where}", params
+            ).fetchone()[0]
+        if self.head:
+            return LocalResponse([], count)
+
+        sql = f"SELECT {self.columns} FROM {self.table}{where}"
+        if self.order_by:
+            sql += " ORDER BY " + ", ".join(self.order_by)
+        if self.limit_count is not None:
+            sql += f" LIMIT {self.limit_count}"
+        rows = self.client.connection.execute(sql, params).fetchall()
+        return LocalResponse([dict(row) for row in rows], count)
+
+    def _execute_insert(self):
+        inserted = []
+        with self.client.connection:
+            for row in self.payload:
+                columns = ", ".join(_identifier(column) for column in row)
+                placeholders = ", ".join("?" for _ in row)
+                cursor = self.client.connection.execute(
+                    f"INSERT INTO {self.table} ({columns}) VALUES ({placeholders}) RETURNING *",
+                    list(row.values()),
+                )
+                inserted.extend(dict(r) for r in cursor.fetchall())
+        return LocalResponse(inserted)
+
+    def _execute_upsert(self):
+        # Mirrors PostgREST: with ignore_duplicates only newly inserted rows are returned
+        target = ""
+        if self.on_conflict:
+            target = "(" + ", ".join(_identifier(column) for column in self.on_conflict) + ")"
+        upserted = []
+        with self.client.connection:
+            for row in self.payload:
+                columns = ", ".join(_identifier(column) for column in row)
+                placeholders = ", ".join("?" for _ in row)
+                if self.ignore_duplicates:
+                    conflict = f"ON CONFLICT {target} DO NOTHING"
+                else:
+                    updates = ", ".join(f"{_identifier(column)} = excluded.{_identifier(column)}" for column in row)
+                    conflict = f"ON CONFLICT {target} DO UPDATE SET {updates}"
+                cursor = self.client.connection.execute(
+                    f"INSERT INTO {self.table} ({columns}) VALUES ({placeholders}) {conflict} RETURNING *",
+                    list(row.values()),
+                )
+                upserted.extend(dict(r) for r in cursor.fetchall())
+        return LocalResponse(upserted)
+
+    def _execute_update(self):
+        where, params = self._where()
+        assignments = ", ".join(f"{_identifier(column)} = ?" for column in self.payload)
+        with self.client.connection:
+            cursor = self.client.connection.execute(
+                f"UPDATE {self.table} SET {assignments}{where} RETURNING *",
+                list(self.payload.values()) + params,
+            )
+            return LocalResponse([dict(r) for r in cursor.fetchall()])
+
+    def _execute_delete(self):
+        where, params = self._where()
+        with self.client.connection:
+            cursor = self.client.connection.execute(f"DELETE FROM {self.table}{where} RETURNING *", params)
+            return LocalResponse([dict(r) for r in cursor.fetchall()])
+
+
+def _class_progress(connection, params):
+    # Same result as sql/class_progress.sql on the hosted project
+    class_ids = list(params.get("p_class_ids") or [])
+    if not class_ids:
+        return []
+    placeholders = ", ".join("?" for _ in class_ids)
+    rows = connection.execute(
+        f"""
+        SELECT a.class_id, COUNT(*) AS total, COUNT(s.activity_id) AS completed
+        FROM activity_table a
+        LEFT JOIN (SELECT DISTINCT activity_id FROM activity_student WHERE student_id = ?) s
+            ON s.activity_id = a.activity_id
+        WHERE a.class_id IN ({placeholders})
+        GROUP BY a.class_id
+        """,
+        [params.get("p_student_id")] + class_ids,
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+RPC_FUNCTIONS = {
+    "class_progress": _class_progress,
+}
+
+
+class LocalRPC:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params or {}
+
+    def execute(self):
+        function = RPC_FUNCTIONS.get(self.name)
+        if function is None:
+            raise LocalAPIError(f"Could not find the function public.{self.name}", code="PGRST202")
+        self.client.simulate_latency()
+        with self.client.lock:
+            try:
+                return LocalResponse(function(self.client.connection, self.params))
+            except sqlite3.Error as e:
+                raise LocalAPIError(str(e), code="42000")
+
+
+def _integrity_error(error):
+    message = str(error)
+    match = re.search(r"UNIQUE constraint failed: (.+)$", message)
+    if match:
+        columns = ", ".join(part.strip().split(".")[-1] for part in match.group(1).split(","))
+        return LocalAPIError(
+            "duplicate key value violates unique constraint",
+            code="23505",
+            details=f"Key ({columns}) already exists.",
+        )
+    return LocalAPIError(message, code="23000")
+
+
+class LocalSupabaseClient:
+    def __init__(self, path=":memory:", latency_ms=0):
+        self.path = path
+        self.latency = max(0.0, float(latency_ms)) / 1000.0
+        self.lock = threading.RLock()
+        self.listeners = []
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def table(self, table_name):
+        return LocalQuery(self, table_name)
+
+    def from_(self, table_name):
+        return self.table(table_name)
+
+    def rpc(self, name, params=None):
+        return LocalRPC(self, name, params)
+
+    def add_listener(self, listener):
+        with self.lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+    def notify(self, table_name, operation, rows):
+        # Deletes carry the full old row, like a table with REPLICA IDENTITY FULL
+        event_type = {"insert": "INSERT", "upsert": "INSERT", "update": "UPDATE", "delete": "DELETE"}[operation]
+        with self.lock:
+            listeners = list(self.listeners)
+        for row in rows:
+            change = {
+                "type": event_type,
+                "table": table_name,
+                "record": {} if event_type == "DELETE" else row,
+                "old_record": row if event_type == "DELETE" else {},
+            }
+            for listener in listeners:
+                try:
+                    listener(change)
+                except Exception as e:
+                    print(f"Error in local change listener: {e}")
+
+    def simulate_latency(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def load_fixture(self, path):
+        with open(path, "r", encoding="utf-8") as fixture:
+            tables = json.load(fixture)
+        for table_name, rows in tables.items():
+            if rows:
+                LocalQuery(self, table_name).insert(rows).execute()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+_local_client = None
+_local_client_lock = threading.Lock()
+
+
+def get_local_client():
+    global _local_client
+    with _local_client_lock:
+        if _local_client is None:
+            _local_client = LocalSupabaseClient(
+                path=os.environ.get("SUPABASE_LOCAL_DB", ":memory:"),
+                latency_ms=os.environ.get("SUPABASE_LOCAL_LATENCY_MS", "0"),
+            )
+            fixture = os.environ.get("SUPABASE_LOCAL_FIXTURE")
+            if fixture:
+                _local_client.load_fixture(fixture)
+        return _local_client
@@ -0,0 +1,24 @@
+import os
+
+# Where on-device caches and snapshots live. PLSP_DATA_DIR overrides the default,
+# which is the Kivy app's user_data_dir when an app is running and ~/.plsp otherwise.
+PLSP_DATA_DIR = os.environ.get("PLSP_DATA_DIR")
+
+
+def get_data_dir():
+    path = PLSP_DATA_DIR
+    if not path:
+        try:
+            from kivy.app import App
+            app = App.get_running_app()
+            path = app.user_data_dir if app else None
+        except ImportError:
+            path = None
+    if not path:
+        path = os.path.join(os.path.expanduser("~"), ".plsp")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_data_path(filename):
+    return os.path.join(get_data_dir(), filename)
@@ -0,0 +1,195 @@
+import itertools
+import os
+import queue
+import smtplib
+import threading
+import time
+from email.mime.text import MIMEText
+
+# SMTP account used for outgoing mail. SMTP_USER and SMTP_PASSWORD have no defaults and must be
+# set in the environment; without them every message fails. To test without sending, point
+# SMTP_HOST/SMTP_PORT at a local server (e.g. `python -m aiosmtpd -n -l localhost:1025`)
+# with SMTP_STARTTLS=0 and SMTP_AUTH=0, which only needs SMTP_USER as the sender address.
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "1") == "1"
+SMTP_AUTH = os.environ.get("SMTP_AUTH", "1") == "1"
+SMTP_USER = os.environ.get("SMTP_USER", "")
+SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD", "")
+SMTP_TIMEOUT = float(os.environ.get("SMTP_TIMEOUT", "20"))
+
+# Each worker keeps one SMTP session open, so this also bounds the number of connections
+MAIL_WORKERS = int(os.environ.get("MAIL_WORKERS", "2"))
+
+# Sessions idle for longer than this are checked with NOOP before they are reused
+MAIL_SESSION_IDLE = float(os.environ.get("MAIL_SESSION_IDLE", "30"))
+
+MAIL_MAX_ATTEMPTS = int(os.environ.get("MAIL_MAX_ATTEMPTS", "4"))
+MAIL_RETRY_DELAY = float(os.environ.get("MAIL_RETRY_DELAY", "2"))
+
+QUEUED = "queued"
+SENDING = "sending"
+RETRYING = "retrying"
+SENT = "sent"
+FAILED = "failed"
+
+
+class MailJob:
+    _ids = itertools.count(1)
+
+    def __init__(self, recipient, subject, body, on_status):
+        self.id = next(self._ids)
+        self.recipient = recipient
+        self.subject = subject
+        self.body = body
+        self.on_status = on_status
+        self.status = QUEUED
+        self.attempts = 0
+        self.error = None
+        self.queued_at = time.perf_counter()
+        self.done = threading.Event()
+
+
+class _Session:
+    def __init__(self):
+        self.server = None
+        self.last_used = 0
+
+    def get(self, dispatcher):
+        if self.server is not None and time.monotonic() - self.last_used > MAIL_SESSION_IDLE:
+            try:
+                self.server.noop()
+            except OSError:
+                # SMTPException (dropped sessions included) is an OSError too
+                self.close()
+        if self.server is None:
+            self.server = dispatcher.connect()
+        return self.server
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
+
+class MailDispatcher:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._instance_lock:
+            if not cls._instance:
+                cls._instance = super(MailDispatcher, cls).__new__(cls, *args, **kwargs)
+                cls._instance.queue = queue.Queue()
+                cls._instance.lock = threading.Lock()
+                cls._instance.workers = []
+                cls._instance.stats = {
+                    "queued": 0, "sent": 0, "failed": 0, "retries": 0, "connections": 0,
+                    "last_latency_ms": None, "max_latency_ms": None,
+                }
+        return cls._instance
+
+    def send(self, recipient, subject, body, on_status=None):
+        # on_status(job) runs on a mail worker thread every time the job changes status
+        job = MailJob(recipient, subject, body, on_status)
+        with self.lock:
+            self.stats["queued"] += 1
+            self._start()
+        self._set_status(job, QUEUED)
+        self.queue.put(job)
+        return job
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, pending=self.queue.qsize(), workers=len(self.workers))
+
+    def connect(self):
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        if SMTP_STARTTLS:
+            server.starttls()
+        if SMTP_AUTH:
+            server.login(SMTP_USER, SMTP_PASSWORD)
+        with self.lock:
+            self.stats["connections"] += 1
+        return server
+
+    def _start(self):
+        # Called with the lock held
+        while len(self.workers) < max(1, MAIL_WORKERS):
+            worker = threading.Thread(target=self._run, name=f"mail-dispatcher-{len(self.workers)}", daemon=True)
+            self.workers.append(worker)
+            worker.start()
+
+    def _run(self):
+        session = _Session()
+        while True:
+            job = self.queue.get()
+            try:
+                self._deliver(session, job)
+            except Exception as e:
+                print(f"Error delivering mail {job.id}: {e}")
+
+    def _deliver(self, session, job):
+        job.attempts += 1
+        if not SMTP_USER or (SMTP_AUTH and not SMTP_PASSWORD):
+            self._finish(job, FAILED, "SMTP_USER and SMTP_PASSWORD are not configured")
+            return
+        self._set_status(job, SENDING)
+        try:
+            server = session.get(self)
+            server.sendmail(SMTP_USER, [job.recipient], self._message(job).as_string())
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPAuthenticationError) as e:
+            # Retrying will not change the answer
+            session.close()
+            self._finish(job, FAILED, e)
+            return
+        except (smtplib.SMTPException, OSError) as e:
+            session.close()
+            if job.attempts >= MAIL_MAX_ATTEMPTS:
+                self._finish(job, FAILED, e)
+                return
+            job.error = str(e)
+            with self.lock:
+                self.stats["retries"] += 1
+            self._set_status(job, RETRYING)
+            # The worker moves on to the next message while this one waits out its backoff
+            timer = threading.Timer(MAIL_RETRY_DELAY * 2 ** (job.attempts - 1), self.queue.put, args=(job,))
+            timer.daemon = True
+            timer.start()
+            return
+
+        session.last_used = time.monotonic()
+        self._finish(job, SENT)
+
+    def _finish(self, job, status, error=None):
+        latency_ms = round((time.perf_counter() - job.queued_at) * 1000, 2)
+        job.error = str(error) if error else None
+        with self.lock:
+            self.stats[status] += 1
+            if status == SENT:
+                self.stats["last_latency_ms"] = latency_ms
+                self.stats["max_latency_ms"] = max(latency_ms, self.stats["max_latency_ms"] or 0)
+        if error:
+            print(f"Could not send mail to {job.recipient}: {error}")
+        self._set_status(job, status)
+        job.done.set()
+
+    @staticmethod
+    def _message(job):
+        msg = MIMEText(job.body, "html")
+        msg['Subject'] = job.subject
+        msg['From'] = SMTP_USER
+        msg['To'] = job.recipient
+        return msg
+
+    @staticmethod
+    def _set_status(job, status):
+        job.status = status
+        if job.on_status:
+            try:
+                job.on_status(job)
+            except Exception as e:
+                print(f"Error in mail status callback: {e}")
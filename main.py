@@ -1,20 +1,111 @@
+from startup_timeline import StartupTimeline
 from kivymd.app import MDApp
 from kivy.core.window import Window
+from kivy.clock import Clock
 from kivymd.uix.screenmanager import ScreenManager
 # from View.class_page import ClassPage_Student, ClassPage_Teacher
-from View.login import Login
+from View.screen_registry import ScreenRegistry
+from refresh_scheduler import RefreshScheduler
+from task_dispatcher import TaskDispatcher
+from session_manager import SessionManager
+
+StartupTimeline().mark("imports")
 
 class MainApp(MDApp):
     def build(self):
+        StartupTimeline().mark("build_start")
         Window.size = (360, 640)
 
         self.theme_cls.primary_palette = "Green"
 
         screen_manager = ScreenManager()
 
-        screen_manager.add_widget(Login(name="Login"))
+        # Only the first screen is built now; every other screen is imported and built on first use
+        ScreenRegistry().attach(screen_manager)
+        role = SessionManager().restore()
+        if role:
+            # A saved login opens the home screen from its profile snapshot and is checked after the first frame
+            ScreenRegistry().show(self.home_screen(role))
+        else:
+            ScreenRegistry().get("Login")
 
+        StartupTimeline().mark("build_end")
         return screen_manager
 
+    def on_start(self):
+        Window.bind(on_flip=self.on_first_frame)
+
+    def on_first_frame(self, *args):
+        Window.unbind(on_flip=self.on_first_frame)
+        StartupTimeline().mark("first_frame")
+        StartupTimeline().dump()
+        # Background warm-up waits until the login screen is visible
+        Clock.schedule_once(self.warm_up)
+
+    def warm_up(self, dt):
+        from supabase_manager import get_supabase_client
+
+        # Import the Supabase client library before the first login needs it
+        TaskDispatcher().submit(get_supabase_client, key="warm_up_client")
+
+        # Writes left in the outbox by an earlier session are replayed once their handlers exist
+        TaskDispatcher().submit(self.register_write_handlers, key="warm_up_outbox")
+
+        if SessionManager().get("resumed"):
+            self.revalidate_session()
+
+    @staticmethod
+    def home_screen(role):
+        return "Home_Student" if role == "student" else "Home_Teacher"
+
+    def revalidate_session(self):
+        from Controller.user_controller import UserController
+        session = SessionManager()
+        role = session.get("role")
+        TaskDispatcher().submit(
+            UserController().revalidate_session,
+            role,
+            session.get(f"{role}_id"),
+            session.get("credential"),
+            on_success=lambda result: self.on_session_revalidated(role, result),
+            key="revalidate_session",
+        )
+
+    def on_session_revalidated(self, role, result):
+        session = SessionManager()
+        if result["status"] == "invalid":
+            # The account behind the saved login is gone or its password was changed
+            from kivymd.toast import toast
+            session.clear()
+            ScreenRegistry().show("Login")
+            ScreenRegistry().reset()
+            toast("Please log in again.")
+        elif result["status"] == "valid":
+            session.refresh(result["profile"])
+            home = self.root.get_screen(self.home_screen(role)) if self.root.has_screen(self.home_screen(role)) else None
+            if home is not None and result["profile"]["full_name"]:
+                home.name_label.text = result["profile"]["full_name"]
+        else:
+            # Offline: keep the saved login and try again next launch
+            print(f"Could not revalidate saved session: {result['message']}")
+
+    @staticmethod
+    def register_write_handlers():
+        from Model.activity_model import ActivityModel
+        from Model.class_model import ClassModel
+        ActivityModel()
+        ClassModel()
+
+    def on_pause(self):
+        # Backgrounded on mobile: stop polling until the app comes back
+        RefreshScheduler().pause()
+        return True
+
+    def on_resume(self):
+        RefreshScheduler().resume()
+        # The network may be back: retry queued writes without waiting for their backoff
+        from write_outbox import WriteOutbox
+        WriteOutbox().flush_now()
+
 if __name__ == "__main__":
     MainApp().run()
@@ -0,0 +1,71 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import bcrypt
+
+# One cost for every device, so a hash never depends on the phone it was made on.
+# Raising BCRYPT_ROUNDS upgrades older hashes at their next login; it can never go below 12.
+BCRYPT_MIN_ROUNDS = 12
+BCRYPT_ROUNDS = max(BCRYPT_MIN_ROUNDS, int(os.environ.get("BCRYPT_ROUNDS", str(BCRYPT_MIN_ROUNDS))))
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", "2"))
+
+
+def completed_future(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def then(future, callback):
+    # Chain callback(done_future) onto future; its return value (or exception) resolves the new future
+    chained = Future()
+
+    def resolve(done):
+        try:
+            chained.set_result(callback(done))
+        except Exception as e:
+            chained.set_exception(e)
+
+    future.add_done_callback(resolve)
+    return chained
+
+
+class PasswordHasher:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._instance_lock:
+            if not cls._instance:
+                cls._instance = super(PasswordHasher, cls).__new__(cls, *args, **kwargs)
+                cls._instance.executor = ThreadPoolExecutor(
+                    max_workers=max(1, HASH_WORKERS), thread_name_prefix="password-hasher"
+                )
+                cls._instance.rounds = BCRYPT_ROUNDS
+        return cls._instance
+
+    def hash(self, password):
+        return self.executor.submit(self._hash, password, self.rounds)
+
+    def verify(self, password, hashed_password):
+        return self.executor.submit(self._verify, password, hashed_password)
+
+    def needs_rehash(self, hashed_password):
+        rounds = self.get_rounds(hashed_password)
+        return rounds is not None and rounds < self.rounds
+
+    @staticmethod
+    def get_rounds(hashed_password):
+        # bcrypt hashes look like $2b$12$<salt+hash>
+        try:
+            return int(hashed_password.split("$")[2])
+        except (AttributeError, IndexError, ValueError):
+            return None
+
+    @staticmethod
+    def _hash(password, rounds):
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+    @staticmethod
+    def _verify(password, hashed_password):
+        return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
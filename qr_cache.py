@@ -0,0 +1,106 @@
+import hashlib
+import os
+from collections import OrderedDict
+from kivy.graphics.texture import Texture
+from local_storage import get_data_path
+from task_dispatcher import TaskDispatcher
+
+# Textures kept in memory; QR matrices are also stored on disk so they show instantly offline
+QR_CACHE_SIZE = int(os.environ.get("QR_CACHE_SIZE", "4"))
+QR_BORDER = 5
+
+
+class QRCodeCache:
+    # Textures are created and read on the Kivy main thread only; rendering happens on the dispatcher
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(QRCodeCache, cls).__new__(cls, *args, **kwargs)
+            cls._instance.textures = OrderedDict()
+            cls._instance.stats = {"hits": 0, "misses": 0, "disk_loads": 0, "renders": 0}
+        return cls._instance
+
+    def get_texture(self, student_id):
+        key = str(student_id)
+        texture = self.textures.get(key)
+        if texture is not None:
+            self.textures.move_to_end(key)
+            self.stats["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+        return texture
+
+    def prepare(self, student_id, on_ready=None):
+        # on_ready(texture) runs on the main thread once the texture exists
+        key = str(student_id)
+        texture = self.textures.get(key)
+        if texture is not None:
+            if on_ready:
+                on_ready(texture)
+            return
+        TaskDispatcher().submit(
+            self._load_pixels,
+            key,
+            on_success=lambda pixels: self._on_pixels(key, pixels, on_ready),
+            key=("qr_code", key),
+        )
+
+    def _on_pixels(self, key, pixels, on_ready):
+        texture = self.textures.get(key)
+        if texture is None:
+            size, buffer = pixels
+            # One texel per QR module; nearest filtering keeps the edges sharp at any display size
+            texture = Texture.create(size=(size, size), colorfmt="rgba")
+            texture.blit_buffer(buffer, colorfmt="rgba", bufferfmt="ubyte")
+            texture.flip_vertical()
+            texture.mag_filter = "nearest"
+            texture.min_filter = "nearest"
+            self.textures[key] = texture
+            while len(self.textures) > max(1, QR_CACHE_SIZE):
+                self.textures.popitem(last=False)
+        if on_ready:
+            on_ready(texture)
+
+    def _load_pixels(self, key):
+        matrix = self._read_matrix(key)
+        if matrix is None:
+            matrix = self._render_matrix(key)
+            self._write_matrix(key, matrix)
+        return len(matrix), self._to_rgba(matrix)
+
+    def _render_matrix(self, key):
+        import qrcode
+        qr = qrcode.QRCode(version=1, border=QR_BORDER)
+        qr.add_data(key)
+        qr.make(fit=True)
+        self.stats["renders"] += 1
+        return qr.get_matrix()
+
+    @staticmethod
+    def _to_rgba(matrix):
+        black = b"\x00\x00\x00\xff"
+        white = b"\xff\xff\xff\xff"
+        return b"".join(black if module else white for row in matrix for module in row)
+
+    @staticmethod
+    def _path(key):
+        return get_data_path(f"qr_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.txt")
+
+    def _read_matrix(self, key):
+        try:
+            with open(self._path(key), "r", encoding="ascii") as cached:
+                matrix = [[character == "1" for character in line.strip()] for line in cached if line.strip()]
+        except OSError:
+            return None
+        if not matrix or any(len(row) != len(matrix) for row in matrix):
+            return None
+        self.stats["disk_loads"] += 1
+        return matrix
+
+    def _write_matrix(self, key, matrix):
+        try:
+            with open(self._path(key), "w", encoding="ascii") as cached:
+                cached.write("\n".join("".join("1" if module else "0" for module in row) for row in matrix))
+        except OSError as e:
+            print(f"Error caching QR code: {e}")
@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", "256"))
+
+# Entries older than their TTL are still served (and refreshed in the background) up to this age
+QUERY_CACHE_MAX_STALE = float(os.environ.get("QUERY_CACHE_MAX_STALE", "600"))
+
+DEFAULT_TTL = 30
+TABLE_TTLS = {
+    "student_table": 300,
+    "teacher_table": 300,
+    "classes": 60,
+    "student_classes": 60,
+    "activity_table": 10,
+    "activity_student": 10,
+}
+
+
+class _Entry:
+    def __init__(self, value):
+        self.value = value
+        self.stored_at = time.monotonic()
+
+
+class QueryCache:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._instance_lock:
+            if not cls._instance:
+                cls._instance = super(QueryCache, cls).__new__(cls, *args, **kwargs)
+                cls._instance.entries = OrderedDict()
+                cls._instance.max_size = max(1, QUERY_CACHE_SIZE)
+                cls._instance.ttls = dict(TABLE_TTLS)
+                cls._instance.lock = threading.Lock()
+                cls._instance.revalidating = set()
+                cls._instance.generations = {}
+                cls._instance.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="query-cache")
+                cls._instance.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "invalidations": 0}
+        return cls._instance
+
+    @staticmethod
+    def make_key(table, filters, columns="*"):
+        normalized = []
+        for column, value in filters.items():
+            if isinstance(value, (list, tuple, set)):
+                value = tuple(sorted(value, key=str))
+            normalized.append((column, value))
+        return table, columns, tuple(sorted(normalized, key=lambda item: item[0]))
+
+    def set_ttl(self, table, seconds):
+        with self.lock:
+            self.ttls[table] = seconds
+
+    def get(self, table, filters, fetch, on_refresh=None, columns="*", fresh=False):
+        # fetch() must return plain data; errors propagate and are never cached.
+        # on_refresh(value) is called from a worker thread when a stale entry changes.
+        # fresh=True always fetches (and stores the result), for callers that check for changes.
+        key = self.make_key(table, filters, columns)
+        now = time.monotonic()
+        with self.lock:
+            entry = None if fresh else self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                age = now - entry.stored_at
+                if age < self.ttls.get(table, DEFAULT_TTL):
+                    self.stats["hits"] += 1
+                    return entry.value
+                if age < QUERY_CACHE_MAX_STALE:
+                    self.stats["stale_hits"] += 1
+                    self._revalidate(key, fetch, on_refresh, entry.value)
+                    return entry.value
+            self.stats["misses"] += 1
+            generation = self.generations.get(table, 0)
+
+        value = fetch()
+        self._store(key, value, generation)
+        return value
+
+    def invalidate(self, table, **filters):
+        # Drops every entry for table whose filters could overlap the written row
+        with self.lock:
+            # Fetches started before this write must not repopulate the cache
+            self.generations[table] = self.generations.get(table, 0) + 1
+            for key in list(self.entries):
+                if key[0] == table and self._matches(dict(key[2]), filters):
+                    del self.entries[key]
+                    self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, size=len(self.entries), max_size=self.max_size)
+
+    @staticmethod
+    def _matches(entry_filters, filters):
+        for column, value in filters.items():
+            if column not in entry_filters:
+                continue
+            cached = entry_filters[column]
+            if isinstance(cached, tuple):
+                if value not in cached:
+                    return False
+            elif cached != value:
+                return False
+        return True
+
+    def _store(self, key, value, generation):
+        with self.lock:
+            if self.generations.get(key[0], 0) != generation:
+                return
+            self.entries[key] = _Entry(value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def _revalidate(self, key, fetch, on_refresh, stale_value):
+        # Called with the lock held
+        if key in self.revalidating:
+            return
+        self.revalidating.add(key)
+        generation = self.generations.get(key[0], 0)
+        self.executor.submit(self._refresh, key, fetch, on_refresh, stale_value, generation)
+
+    def _refresh(self, key, fetch, on_refresh, stale_value, generation):
+        try:
+            value = fetch()
+            self._store(key, value, generation)
+            with self.lock:
+                self.stats["refreshes"] += 1
+            if on_refresh and value != stale_value:
+                on_refresh(value)
+        except Exception as e:
+            print(f"Error refreshing cached query {key}: {e}")
+        finally:
+            with self.lock:
+                self.revalidating.discard(key)
@@ -0,0 +1,190 @@
+import asyncio
+import os
+import threading
+from supabase_manager import SUPABASE_BACKEND, SUPABASE_KEY, SUPABASE_URL
+
+# Set REALTIME_ENABLED=0 to leave screens on their polling fallback
+REALTIME_ENABLED = os.environ.get("REALTIME_ENABLED", "1") != "0"
+
+# Channel states reported to on_status, besides "UNAVAILABLE" when realtime cannot be used at all
+SUBSCRIBED = "SUBSCRIBED"
+
+
+class Subscription:
+    def __init__(self, table, callback, filter, on_status):
+        self.table = table
+        self.callback = callback
+        self.filter = filter
+        self.on_status = on_status
+        self.status = "CONNECTING"
+        self.active = True
+        self.channel = None
+        self.listener = None
+
+    def set_status(self, status):
+        self.status = status
+        if self.active and self.on_status:
+            try:
+                self.on_status(status)
+            except Exception as e:
+                print(f"Error reporting realtime status for {self.table}: {e}")
+
+
+class RealtimeManager:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._instance_lock:
+            if not cls._instance:
+                cls._instance = super(RealtimeManager, cls).__new__(cls, *args, **kwargs)
+                cls._instance.lock = threading.Lock()
+                cls._instance.subscriptions = set()
+                cls._instance.loop = None
+                cls._instance.client = None
+                cls._instance.stats = {"subscribed": 0, "unsubscribed": 0, "events": 0, "errors": 0}
+        return cls._instance
+
+    def subscribe(self, table, callback, filter=None, on_status=None):
+        # filter uses the Supabase syntax "column=eq.value".
+        # callback(change) and on_status(status) run on a background thread.
+        subscription = Subscription(table, callback, filter, on_status)
+        with self.lock:
+            self.subscriptions.add(subscription)
+            self.stats["subscribed"] += 1
+
+        if not REALTIME_ENABLED:
+            subscription.set_status("UNAVAILABLE")
+        elif SUPABASE_BACKEND == "local":
+            self._subscribe_local(subscription)
+        else:
+            self._run(self._subscribe_remote(subscription))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if not subscription.active:
+            return
+        subscription.active = False
+        with self.lock:
+            self.subscriptions.discard(subscription)
+            self.stats["unsubscribed"] += 1
+
+        if subscription.listener is not None:
+            from local_backend import get_local_client
+            get_local_client().remove_listener(subscription.listener)
+        elif subscription.channel is not None:
+            self._run(self._unsubscribe_remote(subscription))
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, active=len(self.subscriptions))
+
+    def _dispatch(self, subscription, change):
+        if not subscription.active:
+            return
+        with self.lock:
+            self.stats["events"] += 1
+        try:
+            subscription.callback(change)
+        except Exception as e:
+            print(f"Error handling realtime change on {subscription.table}: {e}")
+
+    def _subscribe_local(self, subscription):
+        from local_backend import get_local_client
+        column, value = self._parse_filter(subscription.filter)
+
+        def listener(change):
+            if change["table"] != subscription.table:
+                return
+            row = change["record"] or change["old_record"]
+            if column and str(row.get(column)) != value:
+                return
+            self._dispatch(subscription, change)
+
+        subscription.listener = listener
+        get_local_client().add_listener(listener)
+        subscription.set_status(SUBSCRIBED)
+
+    def _run(self, coroutine):
+        # Every remote channel shares one event loop thread and one websocket
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(target=self.loop.run_forever, name="realtime", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    async def _connect(self):
+        if self.client is None:
+            from realtime import AsyncRealtimeClient
+            url = SUPABASE_URL.replace("https://", "wss://").replace("http://", "ws://").rstrip("/") + "/realtime/v1"
+            client = AsyncRealtimeClient(url, SUPABASE_KEY, auto_reconnect=True)
+            await client.connect()
+            self.client = client
+        return self.client
+
+    async def _subscribe_remote(self, subscription):
+        try:
+            client = await self._connect()
+        except ImportError:
+            subscription.set_status("UNAVAILABLE")
+            return
+        except Exception as e:
+            with self.lock:
+                self.stats["errors"] += 1
+            print(f"Error connecting to realtime: {e}")
+            subscription.set_status("CHANNEL_ERROR")
+            return
+
+        try:
+            channel = client.channel(f"{subscription.table}:{subscription.filter or '*'}:{id(subscription)}")
+            channel.on_postgres_changes(
+                "*",
+                table=subscription.table,
+                schema="public",
+                filter=subscription.filter,
+                callback=lambda payload: self._dispatch(subscription, self._normalize(subscription.table, payload)),
+            )
+            subscription.channel = channel
+            await channel.subscribe(lambda status, error=None: self._on_channel_status(subscription, status, error))
+        except Exception as e:
+            with self.lock:
+                self.stats["errors"] += 1
+            print(f"Error subscribing to {subscription.table}: {e}")
+            subscription.set_status("CHANNEL_ERROR")
+            return
+
+        if not subscription.active:
+            # Unsubscribed while the channel was still joining
+            await self._unsubscribe_remote(subscription)
+
+    async def _unsubscribe_remote(self, subscription):
+        try:
+            await self.client.remove_channel(subscription.channel)
+        except Exception as e:
+            print(f"Error removing realtime channel for {subscription.table}: {e}")
+
+    def _on_channel_status(self, subscription, status, error):
+        status = getattr(status, "value", status)
+        if error is not None:
+            with self.lock:
+                self.stats["errors"] += 1
+            print(f"Realtime channel {subscription.table} reported {status}: {error}")
+        subscription.set_status(str(status))
+
+    @staticmethod
+    def _normalize(table, payload):
+        # Realtime payloads nest the change under "data"; screens only see this flat shape
+        data = payload.get("data", payload)
+        return {
+            "type": data.get("type") or data.get("eventType"),
+            "table": data.get("table", table),
+            "record": data.get("record") or data.get("new") or {},
+            "old_record": data.get("old_record") or data.get("old") or {},
+        }
+
+    @staticmethod
+    def _parse_filter(filter):
+        if not filter:
+            return None, None
+        column, _, condition = filter.partition("=")
+        return column, condition.partition(".")[2]
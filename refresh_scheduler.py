@@ -0,0 +1,158 @@
+import os
+import random
+import threading
+from kivy.clock import Clock
+
+# Base and maximum delay between refreshes; every tick that finds nothing new doubles the delay
+REFRESH_INTERVAL = float(os.environ.get("REFRESH_INTERVAL", "5"))
+REFRESH_MAX_INTERVAL = float(os.environ.get("REFRESH_MAX_INTERVAL", "60"))
+
+# Each delay is randomized by +/- this fraction so devices in one classroom drift apart
+REFRESH_JITTER = float(os.environ.get("REFRESH_JITTER", "0.2"))
+
+
+class RefreshJob:
+    def __init__(self, scheduler, key, callback, interval, max_interval, owner):
+        self.scheduler = scheduler
+        self.key = key
+        self.callback = callback
+        self.base_interval = interval
+        self.max_interval = max(interval, max_interval)
+        self.interval = interval
+        self.owner = owner
+        self.event = None
+        self.in_flight = False
+        self.active = True
+        self.stats = {"ticks": 0, "skips": 0, "changes": 0, "unchanged": 0}
+
+    def report(self, changed):
+        # Called by the screen once the refresh started by callback(job) has finished
+        self.in_flight = False
+        if not self.active:
+            return
+        if changed:
+            self.stats["changes"] += 1
+            self.interval = self.base_interval
+        else:
+            self.stats["unchanged"] += 1
+            self.interval = min(self.interval * 2, self.max_interval)
+        self.scheduler.schedule(self)
+
+    def trigger(self):
+        # Refresh soon and start over at the base interval
+        self.interval = self.base_interval
+        self.scheduler.schedule(self, delay=0)
+
+    def cancel(self):
+        self.scheduler.unregister(self.key, job=self)
+
+
+class RefreshScheduler:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._instance_lock:
+            if not cls._instance:
+                cls._instance = super(RefreshScheduler, cls).__new__(cls, *args, **kwargs)
+                cls._instance.jobs = {}
+                cls._instance.paused = False
+                cls._instance.window_bound = False
+                cls._instance.stats = {"registered": 0, "replaced": 0, "ticks": 0, "skips": 0, "pauses": 0}
+        return cls._instance
+
+    def register(self, key, callback, interval=REFRESH_INTERVAL, max_interval=REFRESH_MAX_INTERVAL, owner=None):
+        # callback(job) must eventually call job.report(changed). Registering an existing key
+        # replaces the old job, so a screen can never end up with two pollers.
+        # All methods are meant to be called from the Kivy main thread.
+        self._bind_window()
+        previous = self.jobs.get(key)
+        if previous is not None:
+            self._stop(previous)
+            self.stats["replaced"] += 1
+
+        job = RefreshJob(self, key, callback, interval, max_interval, owner)
+        self.jobs[key] = job
+        self.stats["registered"] += 1
+        # A random first delay spreads clients that opened the same screen at the same time
+        self.schedule(job, delay=random.uniform(0, interval))
+        return job
+
+    def unregister(self, key, job=None):
+        current = self.jobs.get(key)
+        if current is None or (job is not None and current is not job):
+            return
+        del self.jobs[key]
+        self._stop(current)
+
+    def schedule(self, job, delay=None):
+        if not job.active:
+            return
+        if job.event is not None:
+            job.event.cancel()
+        if delay is None:
+            delay = job.interval * random.uniform(1 - REFRESH_JITTER, 1 + REFRESH_JITTER)
+        job.event = Clock.schedule_once(lambda dt: self._tick(job), delay)
+
+    def pause(self):
+        if not self.paused:
+            self.paused = True
+            self.stats["pauses"] += 1
+
+    def resume(self):
+        if self.paused:
+            self.paused = False
+            # Catch up shortly after coming back, still spread out across clients
+            for job in list(self.jobs.values()):
+                job.interval = job.base_interval
+                self.schedule(job, delay=random.uniform(0, 1))
+
+    def get_stats(self):
+        return dict(
+            self.stats,
+            paused=self.paused,
+            jobs={
+                str(key): dict(job.stats, interval=round(job.interval, 2), in_flight=job.in_flight)
+                for key, job in self.jobs.items()
+            },
+        )
+
+    def _tick(self, job):
+        job.event = None
+        if not job.active:
+            return
+        if self.paused or job.in_flight or not self._is_visible(job.owner):
+            # Keep checking at the current interval without doing any work
+            job.stats["skips"] += 1
+            self.stats["skips"] += 1
+            self.schedule(job)
+            return
+
+        job.stats["ticks"] += 1
+        self.stats["ticks"] += 1
+        job.in_flight = True
+        try:
+            job.callback(job)
+        except Exception as e:
+            print(f"Error running refresh {job.key}: {e}")
+            job.report(False)
+
+    @staticmethod
+    def _is_visible(owner):
+        if owner is None:
+            return True
+        manager = getattr(owner, "manager", None)
+        return manager is not None and manager.current == owner.name
+
+    def _stop(self, job):
+        job.active = False
+        if job.event is not None:
+            job.event.cancel()
+            job.event = None
+
+    def _bind_window(self):
+        if self.window_bound:
+            return
+        self.window_bound = True
+        from kivy.core.window import Window
+        Window.bind(on_minimize=lambda *args: self.pause(), on_restore=lambda *args: self.resume())
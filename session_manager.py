@@ -1,3 +1,27 @@
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from local_storage import get_data_path
+
+# A saved login is resumed without the password for this long after it was last refreshed
+SESSION_TTL = float(os.environ.get("SESSION_TTL", str(30 * 24 * 3600)))
+
+# A resumed session's expiry is pushed forward once it is older than this
+SESSION_REFRESH_AFTER = float(os.environ.get("SESSION_REFRESH_AFTER", str(24 * 3600)))
+
+# The cached name is only shown before revalidation while it is this fresh
+PROFILE_TTL = float(os.environ.get("PROFILE_TTL", str(7 * 24 * 3600)))
+
+SESSION_FILE = "session.json"
+SESSION_KEY_FILE = "session.key"
+
+# Session keys that are written to disk; anything else (e.g. login_timings) stays in memory
+PROFILE_KEYS = ("role", "student_id", "teacher_id", "full_name", "email")
+
+
 class SessionManager:
     _instance = None
 
@@ -14,4 +38,108 @@ class SessionManager:
         return self.session_data.get(key, default)
 
     def clear(self):
+        # Logging out also forgets the saved login
         self.session_data.clear()
+        try:
+            os.remove(get_data_path(SESSION_FILE))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing saved session: {e}")
+
+    def persist(self):
+        # Saves the current login with a fresh expiry. The credential fingerprint set at login is
+        # checked against the account on the next launch, so a password change ends the session
+        now = time.time()
+        profile = {key: self.session_data[key] for key in PROFILE_KEYS if self.session_data.get(key) is not None}
+        self._write({
+            "credential": self.session_data.get("credential"),
+            "issued_at": now,
+            "expires_at": now + SESSION_TTL,
+            "profile": profile,
+            "profile_saved_at": now,
+        })
+
+    def restore(self):
+        # Loads a saved, unexpired login into the session; returns the role, or None to show Login
+        saved = self._read()
+        if saved is None:
+            return None
+        now = time.time()
+        if saved["expires_at"] <= now or not saved["profile"].get("role") or not saved.get("credential"):
+            self.clear()
+            return None
+
+        profile = dict(saved["profile"])
+        if now - saved["profile_saved_at"] > PROFILE_TTL:
+            # Too old to show; the home screen fills the name in after revalidation
+            profile.pop("full_name", None)
+        self.session_data.update(profile)
+        self.session_data["credential"] = saved["credential"]
+        self.session_data["resumed"] = True
+        return profile["role"]
+
+    def refresh(self, profile=None):
+        # Called after the saved login was revalidated: updates the snapshot and extends it when due
+        saved = self._read()
+        if saved is None:
+            return
+        if profile:
+            self.session_data.update(profile)
+            saved["profile"].update({key: value for key, value in profile.items() if key in PROFILE_KEYS})
+            saved["profile_saved_at"] = time.time()
+        if time.time() - saved["issued_at"] > SESSION_REFRESH_AFTER:
+            saved["issued_at"] = time.time()
+            saved["expires_at"] = saved["issued_at"] + SESSION_TTL
+        self._write(saved)
+
+    def _read(self):
+        try:
+            with open(get_data_path(SESSION_FILE), "r", encoding="utf-8") as handle:
+                envelope = json.load(handle)
+            body = envelope["body"]
+            # Catches a corrupted or hand-edited file. The key lives in the same directory, so this
+            # is not protection against someone who can copy the whole data directory
+            if not hmac.compare_digest(envelope["signature"], self._sign(body)):
+                print("Ignoring saved session with an invalid signature")
+                return None
+            return json.loads(body)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error reading saved session: {e}")
+            return None
+
+    def _write(self, saved):
+        body = json.dumps(saved, sort_keys=True)
+        path = get_data_path(SESSION_FILE)
+        temp_path = path + ".tmp"
+        try:
+            # Written beside the old file and swapped in, so a crash never leaves half a session
+            descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(descriptor, "w", encoding="utf-8") as handle:
+                json.dump({"body": body, "signature": self._sign(body)}, handle)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error saving session: {e}")
+
+    @staticmethod
+    def _sign(body):
+        return hmac.new(SessionManager._device_key(), body.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def _device_key():
+        # Random per-install key, readable only by the app's user (not a platform keystore)
+        path = get_data_path(SESSION_KEY_FILE)
+        try:
+            with open(path, "rb") as handle:
+                key = handle.read()
+            if len(key) >= 32:
+                return key
+        except FileNotFoundError:
+            pass
+        key = secrets.token_bytes(32)
+        descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "wb") as handle:
+            handle.write(key)
+        return key
@@ -0,0 +1,10 @@
+-- One completion row per (activity, student), so replayed writes from the offline outbox stay idempotent.
+-- Apply once in the Supabase SQL editor; until then ActivityModel clears existing rows before inserting.
+delete from activity_student a
+using activity_student b
+where a.activity_id = b.activity_id
+  and a.student_id = b.student_id
+  and a.id > b.id;
+
+create unique index if not exists activity_student_completion_key
+    on activity_student (activity_id, student_id);
@@ -0,0 +1,15 @@
+-- Completed/total activity counts per class for one student, used by ActivityModel.get_class_progress.
+-- Apply once in the Supabase SQL editor; until then the app falls back to count-only requests.
+create or replace function class_progress(p_student_id text, p_class_ids bigint[])
+returns table (class_id bigint, total bigint, completed bigint)
+language sql
+stable
+as $$
+    select a.class_id, count(*) as total, count(s.activity_id) as completed
+    from activity_table a
+    left join (
+        select distinct activity_id from activity_student where student_id = p_student_id
+    ) s on s.activity_id = a.activity_id
+    where a.class_id = any(p_class_ids)
+    group by a.class_id;
+$$;
@@ -0,0 +1,15 @@
+-- Unique class names and codes. Required: ClassModel.add_class relies on these to reject a duplicate
+-- name or a colliding random code in the insert itself (23505).
+-- Apply once in the Supabase SQL editor.
+do $$
+begin
+    if not exists (select 1 from pg_constraint where conname = 'classes_class_name_key') then
+        alter table classes add constraint classes_class_name_key unique (class_name);
+    end if;
+    if not exists (select 1 from pg_constraint where conname = 'classes_class_code_key') then
+        alter table classes add constraint classes_class_code_key unique (class_code);
+    end if;
+end $$;
+
+-- The earlier sequence-block allocator is gone; its anon-writable table is no longer needed
+drop table if exists class_code_blocks;
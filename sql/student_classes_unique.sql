@@ -0,0 +1,11 @@
+-- One enrollment row per (student, class). Required: the enrollment upserts in ClassModel use
+-- on_conflict="student_id,class_id" and fail with 42P10 until this index exists.
+-- Apply once in the Supabase SQL editor.
+delete from student_classes a
+using student_classes b
+where a.student_id = b.student_id
+  and a.class_id = b.class_id
+  and a.id > b.id;
+
+create unique index if not exists student_classes_enrollment_key
+    on student_classes (student_id, class_id);
@@ -0,0 +1,51 @@
+import json
+import os
+import threading
+import time
+
+# PLSP_STARTUP_TIMELINE=1 prints the startup phases once the first frame is on screen;
+# any other value is treated as a file path and one JSON line per launch is appended to it
+PLSP_STARTUP_TIMELINE = os.environ.get("PLSP_STARTUP_TIMELINE")
+
+# Times are measured from the moment this module is imported, which main.py does first
+_started = time.perf_counter()
+
+
+class StartupTimeline:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._instance_lock:
+            if not cls._instance:
+                cls._instance = super(StartupTimeline, cls).__new__(cls, *args, **kwargs)
+                cls._instance.marks = []
+                cls._instance.dumped = False
+        return cls._instance
+
+    def mark(self, phase):
+        elapsed = round((time.perf_counter() - _started) * 1000, 2)
+        self.marks.append((phase, elapsed))
+        return elapsed
+
+    def get_marks(self):
+        return dict(self.marks)
+
+    def dump(self):
+        if self.dumped or not PLSP_STARTUP_TIMELINE:
+            return
+        self.dumped = True
+
+        if PLSP_STARTUP_TIMELINE == "1":
+            print("Startup timeline (ms since launch):")
+            previous = 0
+            for phase, elapsed in self.marks:
+                print(f"  {phase:<16} {elapsed:>9.2f}  (+{elapsed - previous:.2f})")
+                previous = elapsed
+            return
+
+        try:
+            with open(PLSP_STARTUP_TIMELINE, "a", encoding="utf-8") as output:
+                output.write(json.dumps({"recorded_at": time.time(), "marks": self.get_marks()}) + "\n")
+        except OSError as e:
+            print(f"Error writing startup timeline: {e}")
@@ -0,0 +1,131 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from kivy.clock import Clock
+
+DISPATCHER_WORKERS = int(os.environ.get("DISPATCHER_WORKERS", "4"))
+
+
+class _Subscriber:
+    def __init__(self, owner, on_success, on_error, on_loading):
+        self.owner = owner
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_loading = on_loading
+        self.cancelled = False
+
+
+class Task:
+    def __init__(self, key):
+        self.key = key
+        self.future = None
+        self.subscribers = []
+
+    @property
+    def cancelled(self):
+        return all(subscriber.cancelled for subscriber in self.subscribers)
+
+
+class TaskDispatcher:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._instance_lock:
+            if not cls._instance:
+                cls._instance = super(TaskDispatcher, cls).__new__(cls, *args, **kwargs)
+                cls._instance.executor = ThreadPoolExecutor(
+                    max_workers=max(1, DISPATCHER_WORKERS), thread_name_prefix="task-dispatcher"
+                )
+                cls._instance.lock = threading.RLock()
+                cls._instance.in_flight = {}
+                cls._instance.tasks = set()
+                cls._instance.stats = {"submitted": 0, "deduplicated": 0, "completed": 0, "failed": 0, "cancelled": 0}
+        return cls._instance
+
+    def submit(self, fn, *args, on_success=None, on_error=None, on_loading=None, owner=None, key=None, **kwargs):
+        # fn runs on the pool; callbacks always run on the Kivy main thread.
+        # Tasks sharing a key while one is in flight are merged into a single call.
+        subscriber = _Subscriber(owner, on_success, on_error, on_loading)
+        with self.lock:
+            task = self.in_flight.get(key) if key is not None else None
+            if task is not None:
+                task.subscribers.append(subscriber)
+                self.stats["deduplicated"] += 1
+            else:
+                task = Task(key)
+                task.subscribers.append(subscriber)
+                self.tasks.add(task)
+                if key is not None:
+                    self.in_flight[key] = task
+                self.stats["submitted"] += 1
+                task.future = self.executor.submit(self._run, fn, args, kwargs)
+                task.future.add_done_callback(lambda future, task=task: self._on_done(task))
+
+        if on_loading:
+            on_loading(True)
+        return task
+
+    def cancel(self, task):
+        with self.lock:
+            for subscriber in task.subscribers:
+                subscriber.cancelled = True
+            self._drop_if_cancelled(task)
+
+    def cancel_owner(self, owner):
+        with self.lock:
+            for task in list(self.tasks):
+                for subscriber in task.subscribers:
+                    if subscriber.owner is owner:
+                        subscriber.cancelled = True
+                self._drop_if_cancelled(task)
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, in_flight=len(self.tasks))
+
+    def _drop_if_cancelled(self, task):
+        if task.cancelled and task.future.cancel():
+            self.tasks.discard(task)
+            if self.in_flight.get(task.key) is task:
+                del self.in_flight[task.key]
+            self.stats["cancelled"] += 1
+
+    @staticmethod
+    def _run(fn, args, kwargs):
+        result = fn(*args, **kwargs)
+        # Model/Controller calls may hand back futures (e.g. the password hasher)
+        if isinstance(result, Future):
+            result = result.result()
+        return result
+
+    def _on_done(self, task):
+        with self.lock:
+            self.tasks.discard(task)
+            if self.in_flight.get(task.key) is task:
+                del self.in_flight[task.key]
+        Clock.schedule_once(lambda dt: self._deliver(task))
+
+    def _deliver(self, task):
+        # Cancelled subscribers still hear on_loading(False), so nothing stays in its loading state
+        error = None if task.future.cancelled() else task.future.exception()
+        with self.lock:
+            if not task.future.cancelled():
+                self.stats["failed" if error else "completed"] += 1
+            subscribers = list(task.subscribers)
+
+        for subscriber in subscribers:
+            try:
+                if subscriber.on_loading:
+                    subscriber.on_loading(False)
+                if subscriber.cancelled:
+                    continue
+                if error is not None:
+                    if subscriber.on_error:
+                        subscriber.on_error(error)
+                    else:
+                        print(f"Error in background task {task.key}: {error}")
+                elif subscriber.on_success:
+                    subscriber.on_success(task.future.result())
+            except Exception as e:
+                print(f"Error delivering background task {task.key}: {e}")
@@ -0,0 +1,342 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from local_storage import get_data_path
+from supabase_manager import get_backend_fingerprint
+
+# Entries replayed per handler call
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", "100"))
+
+# Failed writes are retried with exponential backoff (capped) for as long as it takes; only
+# writes the server rejects outright (4xx, constraint and schema errors) are ever dropped.
+# Connection problems do not count as attempts; after this many other failures a write is
+# reported as stuck and retried at the longest backoff.
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_MAX_BACKOFF = float(os.environ.get("OUTBOX_MAX_BACKOFF", "300"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    target TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    retries INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_target ON outbox (kind, target);
+CREATE TABLE IF NOT EXISTS outbox_dead (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    target TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    dropped_at REAL NOT NULL,
+    error TEXT
+);
+"""
+
+
+def is_transient(error):
+    # Network trouble and server-side hiccups: the same write will succeed later
+    if isinstance(error, OSError):
+        return True
+    if type(error).__module__.split(".")[0] in ("httpx", "httpcore"):
+        return True
+    code = str(getattr(error, "code", "") or "")
+    if code.startswith("PGRST0"):
+        # PostgREST could not reach the database
+        return True
+    status = _status_code(error)
+    return status is not None and (status >= 500 or status in (408, 429))
+
+
+def is_permanent(error):
+    # Rejected by the server for what the write contains; retrying cannot succeed
+    code = str(getattr(error, "code", "") or "")
+    if code[:2] in ("22", "23", "42") or (code.startswith("PGRST") and not code.startswith("PGRST0")):
+        return True
+    status = _status_code(error)
+    return status is not None and 400 <= status < 500 and status not in (408, 429)
+
+
+def _status_code(error):
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+class _Handler:
+    def __init__(self, flush, coalesce, delay):
+        self.flush = flush
+        self.coalesce = coalesce
+        self.delay = delay
+
+
+class WriteOutbox:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._instance_lock:
+            if not cls._instance:
+                cls._instance = super(WriteOutbox, cls).__new__(cls, *args, **kwargs)
+                cls._instance.lock = threading.RLock()
+                cls._instance.connection = None
+                cls._instance.handlers = {}
+                cls._instance.listeners = []
+                cls._instance.in_flight = set()
+                cls._instance.wake = threading.Event()
+                cls._instance.worker = None
+                cls._instance.stats = {
+                    "enqueued": 0, "coalesced": 0, "cancelled": 0, "flushed": 0, "batches": 0,
+                    "failed_attempts": 0, "dropped": 0, "split_batches": 0,
+                    "last_flush_latency_ms": None, "max_flush_latency_ms": None,
+                }
+        return cls._instance
+
+    def register_handler(self, kind, flush, coalesce=None, delay=0):
+        # flush(payloads) writes a batch to the server and raises on failure.
+        # coalesce(pending, new) merges a new write into a queued one for the same target:
+        # it returns the payload to keep, or None when the two cancel out.
+        # With a delay, the first write opens a window and everything queued in it is sent as one batch.
+        with self.lock:
+            self.handlers[kind] = _Handler(flush, coalesce, delay)
+        self._start()
+        # Rows of this kind may have been waiting for a handler since startup
+        self.wake.set()
+
+    def add_listener(self, listener):
+        # listener(event) runs on the outbox thread after every flushed, failed, stuck or dropped batch
+        with self.lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+    def enqueue(self, kind, target, payload):
+        with self.lock:
+            connection = self._connect()
+            handler = self.handlers.get(kind)
+            pending = connection.execute(
+                "SELECT id, payload FROM outbox WHERE kind = ? AND target = ? ORDER BY id DESC LIMIT 1",
+                (kind, target),
+            ).fetchone()
+            with connection:
+                if pending is not None and pending[0] not in self.in_flight and handler and handler.coalesce:
+                    merged = handler.coalesce(json.loads(pending[1]), payload)
+                    if merged is None:
+                        connection.execute("DELETE FROM outbox WHERE id = ?", (pending[0],))
+                        self.stats["cancelled"] += 1
+                    else:
+                        connection.execute("UPDATE outbox SET payload = ? WHERE id = ?", (json.dumps(merged), pending[0]))
+                        self.stats["coalesced"] += 1
+                else:
+                    now = time.time()
+                    connection.execute(
+                        "INSERT INTO outbox (kind, target, payload, created_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)",
+                        (kind, target, json.dumps(payload), now, self._window_end(kind, now)),
+                    )
+                    self.stats["enqueued"] += 1
+        self.wake.set()
+
+    def _window_end(self, kind, now):
+        # Called with the lock held: joins the batch window already open for kind, if any
+        handler = self.handlers.get(kind)
+        if handler is None or not handler.delay:
+            return 0
+        row = self.connection.execute(
+            "SELECT MIN(next_attempt_at) FROM outbox WHERE kind = ? AND attempts = 0 AND next_attempt_at > ?",
+            (kind, now),
+        ).fetchone()
+        return row[0] if row[0] is not None else now + handler.delay
+
+    def pending(self, kind):
+        # Queued payloads in write order, including the batch currently being sent
+        with self.lock:
+            rows = self._connect().execute("SELECT payload FROM outbox WHERE kind = ? ORDER BY id", (kind,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def flush_now(self):
+        # Retry everything immediately, e.g. when the network comes back
+        with self.lock:
+            with self._connect():
+                self.connection.execute("UPDATE outbox SET next_attempt_at = 0")
+        self.wake.set()
+
+    def get_stats(self):
+        with self.lock:
+            connection = self._connect()
+            depth = connection.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+            stuck = connection.execute(
+                "SELECT COUNT(*) FROM outbox WHERE attempts >= ?", (OUTBOX_MAX_ATTEMPTS,)
+            ).fetchone()[0]
+            dead = connection.execute("SELECT COUNT(*) FROM outbox_dead").fetchone()[0]
+            return dict(self.stats, depth=depth, in_flight=len(self.in_flight), stuck=stuck, dead=dead)
+
+    def get_dropped(self, kind=None):
+        # Writes the server rejected, kept on the device so they can be inspected or re-entered
+        with self.lock:
+            rows = self._connect().execute(
+                "SELECT kind, payload, dropped_at, error FROM outbox_dead ORDER BY id"
+            ).fetchall()
+        return [
+            {"kind": row[0], "payload": json.loads(row[1]), "dropped_at": row[2], "error": row[3]}
+            for row in rows if kind is None or row[0] == kind
+        ]
+
+    def _start(self):
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._run, name="write-outbox", daemon=True)
+                self.worker.start()
+
+    def _run(self):
+        while True:
+            self.wake.wait(timeout=self._seconds_until_due())
+            self.wake.clear()
+            try:
+                while self._flush_due():
+                    pass
+            except Exception as e:
+                print(f"Error replaying outbox: {e}")
+
+    def _seconds_until_due(self):
+        # Rows of kinds nobody handles (yet) are left alone, so they cannot keep the worker spinning
+        with self.lock:
+            kinds = list(self.handlers)
+            if not kinds:
+                return None
+            placeholders = ", ".join("?" for _ in kinds)
+            row = self._connect().execute(
+                f"SELECT MIN(next_attempt_at) FROM outbox WHERE kind IN ({placeholders})", kinds
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def _flush_due(self):
+        # Sends the oldest due entries, grouped by kind in write order; True if anything was sent.
+        # A row waits while an older row for the same target is backing off, so writes to one
+        # target always reach the server in the order they were made.
+        with self.lock:
+            kinds = list(self.handlers)
+            if not kinds:
+                return False
+            placeholders = ", ".join("?" for _ in kinds)
+            now = time.time()
+            rows = self._connect().execute(
+                "SELECT id, kind, payload, created_at, attempts, retries, target FROM outbox "
+                f"WHERE next_attempt_at <= ? AND kind IN ({placeholders}) AND NOT EXISTS ("
+                "    SELECT 1 FROM outbox AS older WHERE older.kind = outbox.kind AND older.target = outbox.target"
+                "    AND older.id < outbox.id AND older.next_attempt_at > ?"
+                ") ORDER BY id LIMIT ?",
+                [now] + kinds + [now, OUTBOX_BATCH_SIZE],
+            ).fetchall()
+            groups = {}
+            for row in rows:
+                groups.setdefault(row[1], []).append(row)
+                self.in_flight.add(row[0])
+
+        for kind, entries in groups.items():
+            self._flush_group(kind, entries)
+        return bool(groups)
+
+    def _flush_group(self, kind, entries):
+        ids = [entry[0] for entry in entries]
+        payloads = [json.loads(entry[2]) for entry in entries]
+        try:
+            self.handlers[kind].flush(payloads)
+        except Exception as e:
+            if len(entries) > 1 and not is_transient(e):
+                # Something in the batch was rejected: send the entries one by one so a
+                # single bad write cannot hold back or take down the others
+                with self.lock:
+                    self.stats["split_batches"] += 1
+                failed_targets = set()
+                for entry in entries:
+                    if entry[6] in failed_targets:
+                        # Stays queued behind the older write that is now backing off
+                        continue
+                    if not self._flush_group(kind, [entry]):
+                        failed_targets.add(entry[6])
+                return True
+            return self._on_failure(kind, entries, payloads, e)
+        finally:
+            with self.lock:
+                self.in_flight.difference_update(ids)
+
+        latency_ms = round((time.time() - min(entry[3] for entry in entries)) * 1000, 2)
+        with self.lock:
+            with self._connect():
+                self.connection.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+            self.stats["flushed"] += len(ids)
+            self.stats["batches"] += 1
+            self.stats["last_flush_latency_ms"] = latency_ms
+            self.stats["max_flush_latency_ms"] = max(latency_ms, self.stats["max_flush_latency_ms"] or 0)
+        self._notify({"kind": kind, "status": "flushed", "payloads": payloads})
+        return True
+
+    def _on_failure(self, kind, entries, payloads, error):
+        # Returns True when the entries left the queue (dropped), False when they will be retried.
+        # Only a single rejected write is dropped; batches are split before they get here
+        if len(entries) == 1 and is_permanent(error):
+            self._drop(kind, entries[0], payloads, error)
+            return True
+
+        transient = is_transient(error)
+        attempts = max(entry[4] for entry in entries) + (0 if transient else 1)
+        retries = max(entry[5] for entry in entries) + 1
+        print(f"Error flushing {len(entries)} {kind} write(s) (retry {retries}): {error}")
+        delay = min(2 ** retries, OUTBOX_MAX_BACKOFF) * random.uniform(0.8, 1.2)
+        with self.lock:
+            self.stats["failed_attempts"] += 1
+            with self._connect():
+                self.connection.executemany(
+                    "UPDATE outbox SET attempts = ?, retries = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    [(attempts, retries, time.time() + delay, str(error), entry[0]) for entry in entries],
+                )
+        status = "stuck" if attempts >= OUTBOX_MAX_ATTEMPTS else "failed"
+        self._notify({"kind": kind, "status": status, "payloads": payloads, "error": str(error)})
+        return False
+
+    def _drop(self, kind, entry, payloads, error):
+        print(f"Dropping {kind} write rejected by the server: {error}")
+        with self.lock:
+            with self._connect():
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO outbox_dead (id, kind, target, payload, created_at, dropped_at, error) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (entry[0], kind, entry[6], entry[2], entry[3], time.time(), str(error)),
+                )
+                self.connection.execute("DELETE FROM outbox WHERE id = ?", (entry[0],))
+            self.stats["dropped"] += 1
+        self._notify({"kind": kind, "status": "dropped", "payloads": payloads, "error": str(error)})
+
+    def _notify(self, event):
+        with self.lock:
+            listeners = list(self.listeners)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Error in outbox listener: {e}")
+
+    def _connect(self):
+        # Called with the lock held
+        if self.connection is None:
+            self.connection = sqlite3.connect(get_data_path(f"outbox_{get_backend_fingerprint()}.db"), check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+            columns = {row[1] for row in self.connection.execute("PRAGMA table_info(outbox)")}
+            if "retries" not in columns:
+                # Outboxes created before retries were tracked apart from attempts
+                self.connection.execute("ALTER TABLE outbox ADD COLUMN retries INTEGER NOT NULL DEFAULT 0")
+        return self.connection